@@ -1,5 +1,6 @@
 # core/services/google_service.py
 import logging
+import re
 from typing import Any
 
 import google.generativeai as genai
@@ -9,6 +10,8 @@ from .ai_service import AIService
 
 logger = logging.getLogger(__name__)
 
+_CJK_RE = re.compile(r"[\u4e00-\u9fff]")
+
 
 class GoogleService(AIService):
     """Google Gemini 服務實作"""
@@ -145,7 +148,7 @@ class GoogleService(AIService):
             int: 估算的 token 數量
         """
         # 粗略估算：英文 1 token ≈ 4 字元，中文 1 token ≈ 1.5 字元
-        chinese_chars = sum(1 for char in text if "\u4e00" <= char <= "\u9fff")
+        chinese_chars = len(_CJK_RE.findall(text))
         other_chars = len(text) - chinese_chars
 
         estimated_tokens = int(chinese_chars / 1.5 + other_chars / 4)
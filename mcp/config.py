@@ -11,6 +11,29 @@ from dataclasses import dataclass, field
 from pathlib import Path
 
 from .exceptions import MCPConfigurationError
+from . import serialization
+
+
+# to_dict() 輸出的欄位（維持既有的對外欄位集合）
+_DICT_FIELDS = (
+    "protocol_version",
+    "max_connections",
+    "connection_timeout",
+    "request_timeout",
+    "ollama_host",
+    "ollama_port",
+    "ollama_timeout",
+    "default_model",
+    "enabled_connectors",
+    "connector_timeout",
+    "enable_cache",
+    "cache_ttl",
+    "cache_max_size",
+    "log_level",
+    "log_format",
+    "api_key_env_prefix",
+    "allowed_hosts",
+)
 
 
 @dataclass
@@ -33,6 +56,12 @@ class MCPConfig:
     lmstudio_port: int = 1234
     lmstudio_timeout: int = 300
     
+    # LLM HTTP 連線池配置
+    llm_connections_per_host: int = 32
+    llm_keepalive_timeout: int = 75
+    # 每個模型同時進行的請求上限；0 表示不限制（交由後端自行排程並行請求）
+    max_concurrent_per_model: int = 0
+    
     # 預設 LLM 服務和模型
     default_llm_service: str = "auto"  # auto, ollama, lmstudio
     default_model: str = "llama2"
@@ -47,6 +76,9 @@ class MCPConfig:
     enable_cache: bool = True
     cache_ttl: int = 3600  # 1 hour
     cache_max_size: int = 1000
+    model_list_ttl: int = 30  # 模型列表快取秒數
+    # 相同聊天請求的回應快取（預設關閉：取樣溫度非零時每次回應本應不同）
+    enable_response_cache: bool = False
     
     # 日誌配置
     log_level: str = "INFO"
@@ -76,6 +108,10 @@ class MCPConfig:
             "MCP_LMSTUDIO_PORT": ("lmstudio_port", int),
             "MCP_LMSTUDIO_TIMEOUT": ("lmstudio_timeout", int),
             
+            "MCP_LLM_CONNECTIONS_PER_HOST": ("llm_connections_per_host", int),
+            "MCP_LLM_KEEPALIVE_TIMEOUT": ("llm_keepalive_timeout", int),
+            "MCP_MAX_CONCURRENT_PER_MODEL": ("max_concurrent_per_model", int),
+            
             "MCP_DEFAULT_LLM_SERVICE": ("default_llm_service", str),
             "MCP_DEFAULT_MODEL": ("default_model", str),
             
@@ -83,6 +119,10 @@ class MCPConfig:
             "MCP_ENABLE_CACHE": ("enable_cache", lambda x: x.lower() == "true"),
             "MCP_CACHE_TTL": ("cache_ttl", int),
             "MCP_CACHE_MAX_SIZE": ("cache_max_size", int),
+            "MCP_MODEL_LIST_TTL": ("model_list_ttl", int),
+            "MCP_ENABLE_RESPONSE_CACHE": (
+                "enable_response_cache", lambda x: x.lower() == "true"
+            ),
             
             "MCP_LOG_LEVEL": ("log_level", str),
         }
@@ -138,6 +178,12 @@ class MCPConfig:
         if self.ollama_port <= 0 or self.ollama_port > 65535:
             errors.append("ollama_port must be between 1 and 65535")
         
+        if self.llm_connections_per_host <= 0:
+            errors.append("llm_connections_per_host must be positive")
+        
+        if self.max_concurrent_per_model < 0:
+            errors.append("max_concurrent_per_model must not be negative")
+        
         # 驗證日誌級別
         valid_log_levels = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
         if self.log_level not in valid_log_levels:
@@ -160,27 +206,26 @@ class MCPConfig:
                 f"Configuration validation failed: {'; '.join(errors)}"
             )
     
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        # 任何欄位變更都使快取的字典失效
+        self.__dict__.pop("_dict_cache", None)
+    
+    def _as_dict(self) -> Dict[str, Any]:
+        """取得快取的字典表示（僅供內部唯讀使用）"""
+        cached = self.__dict__.get("_dict_cache")
+        if cached is None:
+            cached = {name: getattr(self, name) for name in _DICT_FIELDS}
+            self.__dict__["_dict_cache"] = cached
+        return cached
+    
     def to_dict(self) -> Dict[str, Any]:
         """轉換為字典格式"""
-        return {
-            "protocol_version": self.protocol_version,
-            "max_connections": self.max_connections,
-            "connection_timeout": self.connection_timeout,
-            "request_timeout": self.request_timeout,
-            "ollama_host": self.ollama_host,
-            "ollama_port": self.ollama_port,
-            "ollama_timeout": self.ollama_timeout,
-            "default_model": self.default_model,
-            "enabled_connectors": self.enabled_connectors,
-            "connector_timeout": self.connector_timeout,
-            "enable_cache": self.enable_cache,
-            "cache_ttl": self.cache_ttl,
-            "cache_max_size": self.cache_max_size,
-            "log_level": self.log_level,
-            "log_format": self.log_format,
-            "api_key_env_prefix": self.api_key_env_prefix,
-            "allowed_hosts": self.allowed_hosts,
-        }
+        return dict(self._as_dict())
+    
+    def to_json_bytes(self) -> bytes:
+        """序列化為 JSON bytes（供 API 輸出使用）"""
+        return serialization.dumps(self._as_dict())
 
 
 # 全域配置實例
@@ -5,12 +5,13 @@ MCP 連接器基類
 """
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union, final
 from dataclasses import dataclass
 from enum import Enum
 
 from ..exceptions import MCPConnectorError
 from ..config import get_config
+from .validation import ArgumentValidator, compile_validator
 
 
 class ConnectorType(Enum):
@@ -22,7 +23,7 @@ class ConnectorType(Enum):
     GITHUB = "github"
 
 
-@dataclass
+@dataclass(slots=True)
 class ConnectorConfig:
     """連接器配置"""
     name: str
@@ -37,7 +38,7 @@ class ConnectorConfig:
             self.config = {}
 
 
-@dataclass 
+@dataclass(slots=True, frozen=True)
 class ResourceInfo:
     """資源資訊"""
     uri: str
@@ -47,7 +48,7 @@ class ResourceInfo:
     annotations: Optional[Dict[str, Any]] = None
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ToolInfo:
     """工具資訊"""
     name: str
@@ -61,9 +62,16 @@ class BaseConnector(ABC):
     def __init__(self, config: ConnectorConfig):
         self.config = config
         self.mcp_config = get_config()
+        # 快取類型字串，避免錯誤建構時重複存取 enum .value
+        self._type_value = config.type.value
         self._initialized = False
         self._resources: List[ResourceInfo] = []
         self._tools: List[ToolInfo] = []
+        # 不可變快照，於新增時重建，list_* 直接返回而不需每次複製
+        self._resources_snapshot: Tuple[ResourceInfo, ...] = ()
+        self._tools_snapshot: Tuple[ToolInfo, ...] = ()
+        # 依工具名稱索引的參數驗證函數，於新增工具時編譯一次
+        self._tool_validators: Dict[str, ArgumentValidator] = {}
     
     @property
     def name(self) -> str:
@@ -102,14 +110,15 @@ class BaseConnector(ABC):
     
     # 資源相關方法
     
-    async def list_resources(self) -> List[ResourceInfo]:
-        """列出可用資源"""
+    @final
+    async def list_resources(self) -> Tuple[ResourceInfo, ...]:
+        """列出可用資源（返回不可變序列）"""
         if not self._initialized:
             raise MCPConnectorError(
                 "Connector not initialized", 
-                connector_type=self.type.value
+                connector_type=self._type_value
             )
-        return self._resources.copy()
+        return self._resources_snapshot
     
     @abstractmethod
     async def read_resource(self, uri: str) -> Dict[str, Any]:
@@ -128,14 +137,15 @@ class BaseConnector(ABC):
     
     # 工具相關方法
     
-    async def list_tools(self) -> List[ToolInfo]:
-        """列出可用工具"""
+    @final
+    async def list_tools(self) -> Tuple[ToolInfo, ...]:
+        """列出可用工具（返回不可變序列）"""
         if not self._initialized:
             raise MCPConnectorError(
                 "Connector not initialized",
-                connector_type=self.type.value
+                connector_type=self._type_value
             )
-        return self._tools.copy()
+        return self._tools_snapshot
     
     @abstractmethod
     async def call_tool(
@@ -155,19 +165,40 @@ class BaseConnector(ABC):
     async def get_prompt(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """取得提示內容"""
         raise MCPConnectorError(
-            f"Prompt '{name}' not supported by {self.type.value} connector",
-            connector_type=self.type.value
+            f"Prompt '{name}' not supported by {self._type_value} connector",
+            connector_type=self._type_value
         )
     
     # 內部輔助方法
     
+    @final
     def _add_resource(self, resource: ResourceInfo) -> None:
         """新增資源"""
         self._resources.append(resource)
+        self._resources_snapshot = tuple(self._resources)
     
+    @final
     def _add_tool(self, tool: ToolInfo) -> None:
         """新增工具"""
         self._tools.append(tool)
+        self._tools_snapshot = tuple(self._tools)
+        self._tool_validators[tool.name] = compile_validator(tool.input_schema)
+    
+    @final
+    def _validate_tool_arguments(
+        self, name: str, arguments: Dict[str, Any]
+    ) -> None:
+        """以預先編譯的 input_schema 驗證工具參數"""
+        validator = self._tool_validators.get(name)
+        if validator is None:
+            return
+        try:
+            validator(arguments)
+        except ValueError as e:
+            raise MCPConnectorError(
+                f"Invalid arguments for tool '{name}': {e}",
+                connector_type=self._type_value
+            ) from e
     
     def _validate_config(self, required_keys: List[str]) -> None:
         """驗證配置項目"""
@@ -178,7 +209,7 @@ class BaseConnector(ABC):
         if missing_keys:
             raise MCPConnectorError(
                 f"Missing required config keys: {missing_keys}",
-                connector_type=self.type.value
+                connector_type=self._type_value
             )
     
     async def __aenter__(self):
@@ -191,4 +222,4 @@ class BaseConnector(ABC):
         await self.cleanup()
     
     def __repr__(self) -> str:
-        return f"{self.__class__.__name__}(name='{self.name}', type='{self.type.value}')"
\ No newline at end of file
+        return f"{self.__class__.__name__}(name='{self.name}', type='{self._type_value}')"
\ No newline at end of file
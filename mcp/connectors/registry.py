@@ -4,7 +4,9 @@ MCP 連接器註冊表
 管理所有可用的 MCP 連接器。
 """
 
-from typing import Dict, List, Type, Optional
+from typing import Dict, List, Tuple, Type, Optional
+import asyncio
+import inspect
 import logging
 
 from .base import BaseConnector, ConnectorConfig, ConnectorType
@@ -17,8 +19,12 @@ logger = logging.getLogger(__name__)
 class ConnectorRegistry:
     """連接器註冊表"""
     
-    def __init__(self):
+    def __init__(self, max_concurrent_health_checks: int = 10):
+        # 同時進行的健康檢查上限，避免大量連接器同時衝擊下游服務
+        self.max_concurrent_health_checks = max_concurrent_health_checks
         self._connector_classes: Dict[ConnectorType, Type[BaseConnector]] = {}
+        # 已註冊類型的字串值快照，於註冊變更時重建
+        self._registered_type_values: Tuple[str, ...] = ()
         self._active_connectors: Dict[str, BaseConnector] = {}
     
     def register_connector(
@@ -27,20 +33,36 @@ class ConnectorRegistry:
         connector_class: Type[BaseConnector]
     ) -> None:
         """註冊連接器類別"""
-        if not issubclass(connector_class, BaseConnector):
+        if not (
+            isinstance(connector_class, type)
+            and issubclass(connector_class, BaseConnector)
+        ):
             raise MCPConnectorError(
-                f"Connector class must inherit from BaseConnector",
+                "Connector class must inherit from BaseConnector",
+                connector_type=connector_type.value
+            )
+        if inspect.isabstract(connector_class):
+            raise MCPConnectorError(
+                "Connector class must implement all abstract methods",
                 connector_type=connector_type.value
             )
         
         self._connector_classes[connector_type] = connector_class
-        logger.info(f"Registered connector: {connector_type.value}")
+        self._refresh_registered_type_values()
+        logger.info("Registered connector: %s", connector_type.value)
     
     def unregister_connector(self, connector_type: ConnectorType) -> None:
         """取消註冊連接器類別"""
         if connector_type in self._connector_classes:
             del self._connector_classes[connector_type]
-            logger.info(f"Unregistered connector: {connector_type.value}")
+            self._refresh_registered_type_values()
+            logger.info("Unregistered connector: %s", connector_type.value)
+    
+    def _refresh_registered_type_values(self) -> None:
+        """重建已註冊類型的字串值快照"""
+        self._registered_type_values = tuple(
+            connector_type.value for connector_type in self._connector_classes
+        )
     
     def create_connector(self, config: ConnectorConfig) -> BaseConnector:
         """建立連接器實例"""
@@ -56,7 +78,7 @@ class ConnectorRegistry:
         # 如果連接器已啟用，加入活躍連接器列表
         if config.enabled:
             self._active_connectors[config.name] = connector
-            logger.info(f"Created active connector: {config.name}")
+            logger.info("Created active connector: %s", config.name)
         
         return connector
     
@@ -79,53 +101,84 @@ class ConnectorRegistry:
         """列出所有已註冊的連接器類型"""
         return list(self._connector_classes.keys())
     
+    def list_registered_type_values(self) -> Tuple[str, ...]:
+        """列出所有已註冊的連接器類型值（不可變快照）"""
+        return self._registered_type_values
+    
     async def initialize_all(self) -> None:
-        """初始化所有活躍連接器"""
-        for name, connector in self._active_connectors.items():
+        """並行初始化所有活躍連接器"""
+        async def initialize(name: str, connector: BaseConnector) -> bool:
             try:
                 if not connector.is_initialized:
                     await connector.initialize()
-                    logger.info(f"Initialized connector: {name}")
+                    logger.info("Initialized connector: %s", name)
+                return True
             except Exception as e:
-                logger.error(f"Failed to initialize connector {name}: {e}")
-                # 從活躍列表中移除失敗的連接器
-                if name in self._active_connectors:
-                    del self._active_connectors[name]
+                logger.error("Failed to initialize connector %s: %s", name, e)
+                return False
+        
+        snapshot = tuple(self._active_connectors.items())
+        results = await asyncio.gather(
+            *(initialize(name, connector) for name, connector in snapshot)
+        )
+        
+        # 從活躍列表中移除失敗的連接器（全部完成後一次處理）
+        for (name, _), ok in zip(snapshot, results):
+            if not ok:
+                self._active_connectors.pop(name, None)
     
     async def cleanup_all(self) -> None:
-        """清理所有活躍連接器"""
-        for name, connector in list(self._active_connectors.items()):
+        """並行清理所有活躍連接器"""
+        async def cleanup(name: str, connector: BaseConnector) -> None:
             try:
                 if connector.is_initialized:
                     await connector.cleanup()
-                    logger.info(f"Cleaned up connector: {name}")
+                    logger.info("Cleaned up connector: %s", name)
             except Exception as e:
-                logger.error(f"Failed to cleanup connector {name}: {e}")
-            finally:
-                # 從活躍列表中移除
-                if name in self._active_connectors:
-                    del self._active_connectors[name]
+                logger.error("Failed to cleanup connector %s: %s", name, e)
+        
+        snapshot = tuple(self._active_connectors.items())
+        await asyncio.gather(
+            *(cleanup(name, connector) for name, connector in snapshot)
+        )
+        
+        # 從活躍列表中移除
+        for name, _ in snapshot:
+            self._active_connectors.pop(name, None)
     
     async def health_check_all(self) -> Dict[str, bool]:
-        """對所有連接器進行健康檢查"""
-        results = {}
-        for name, connector in self._active_connectors.items():
+        """並行對所有連接器進行健康檢查（受並行上限限制）"""
+        semaphore = asyncio.Semaphore(self.max_concurrent_health_checks)
+        
+        async def check(name: str, connector: BaseConnector) -> bool:
             try:
-                if connector.is_initialized:
-                    results[name] = await connector.health_check()
-                else:
-                    results[name] = False
+                if not connector.is_initialized:
+                    return False
+                async with semaphore:
+                    # 以連接器自身的 timeout 限制單次檢查，避免卡住整批檢查
+                    async with asyncio.timeout(connector.config.timeout):
+                        return await connector.health_check()
+            except TimeoutError:
+                logger.error(
+                    "Health check timed out for connector %s after %ss",
+                    name, connector.config.timeout
+                )
+                return False
             except Exception as e:
-                logger.error(f"Health check failed for connector {name}: {e}")
-                results[name] = False
+                logger.error("Health check failed for connector %s: %s", name, e)
+                return False
         
-        return results
+        snapshot = tuple(self._active_connectors.items())
+        results = await asyncio.gather(
+            *(check(name, connector) for name, connector in snapshot)
+        )
+        return {name: healthy for (name, _), healthy in zip(snapshot, results)}
     
     def remove_connector(self, name: str) -> bool:
         """移除連接器"""
         if name in self._active_connectors:
             del self._active_connectors[name]
-            logger.info(f"Removed connector: {name}")
+            logger.info("Removed connector: %s", name)
             return True
         return False
     
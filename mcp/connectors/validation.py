@@ -0,0 +1,27 @@
+"""
+MCP 工具參數驗證
+
+於註冊工具時以 fastjsonschema 將 input_schema 預先編譯為 Python 函數，
+呼叫工具時只執行已編譯的驗證函數。
+"""
+
+from typing import Any, Callable, Dict
+
+import fastjsonschema
+
+
+# 驗證失敗時拋出 ValueError（訊息為 schema 錯誤描述）
+ArgumentValidator = Callable[[Dict[str, Any]], None]
+
+
+def compile_validator(schema: Dict[str, Any]) -> ArgumentValidator:
+    """將 JSON Schema 編譯為驗證函數"""
+    validate = fastjsonschema.compile(schema)
+    
+    def validator(arguments: Dict[str, Any]) -> None:
+        try:
+            validate(arguments)
+        except fastjsonschema.JsonSchemaException as e:
+            raise ValueError(e.message) from e
+    
+    return validator
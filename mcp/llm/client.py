@@ -4,33 +4,60 @@ Ollama 客戶端
 與 Ollama LLM 服務的整合客戶端。
 """
 
-import asyncio
-import json
 import logging
-from typing import Dict, List, Optional, AsyncGenerator
+import time
+import weakref
+from typing import Any, Dict, List, Optional, AsyncGenerator, AsyncIterator, Tuple
 import aiohttp
 
-from ..config import get_config
+from .. import serialization
+from ..config import MCPConfig, get_config
 from ..exceptions import MCPLLMError
+from .connection import create_connector
 from .types import (
     ModelInfo, LLMResponse, ChatMessage, GenerateRequest, 
-    ChatRequest, LLMStatus
+    ChatRequest, LLMStatus, infer_capabilities
 )
 
 
 logger = logging.getLogger(__name__)
 
 
+def _warn_unclosed_session(session: aiohttp.ClientSession) -> None:
+    """客戶端被回收時若會話仍開啟則發出警告（不在 GC 期間操作事件循環）"""
+    if not session.closed:
+        logger.warning(
+            "OllamaClient was garbage collected with an open session; "
+            "call 'await client.close()' explicitly"
+        )
+
+# 預先序列化的請求主體所使用的標頭
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
 class OllamaClient:
     """Ollama 客戶端"""
     
-    def __init__(self, host: Optional[str] = None, port: Optional[int] = None):
-        self.config = get_config()
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        config: Optional[MCPConfig] = None,
+        connector: Optional[aiohttp.BaseConnector] = None
+    ):
+        # 允許由管理器注入已解析的配置，避免每個實例各自查詢全域配置
+        self.config = config or get_config()
+        # 外部共用的連線池（由建立者負責關閉）；未提供時自行建立
+        self._connector = connector
         self.host = host or self.config.ollama_host
         self.port = port or self.config.ollama_port
         self.base_url = f"http://{self.host}:{self.port}"
         self.timeout = self.config.ollama_timeout
+        # 模型列表快取有效時間（秒）
+        self.models_ttl = self.config.model_list_ttl
         self._session: Optional[aiohttp.ClientSession] = None
+        self._finalizer: Optional[weakref.finalize] = None
+        self._models_cache: Optional[Tuple[float, List[ModelInfo]]] = None
     
     async def __aenter__(self):
         """異步上下文管理器入口"""
@@ -38,26 +65,45 @@ class OllamaClient:
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """異步上下文管理器出口"""
-        await self._close_session()
+        """異步上下文管理器出口
+
+        長期持有會話的呼叫端（如統一管理器）不使用上下文管理器，而是明確呼叫 close()。
+        """
+        await self.close()
     
     async def _ensure_session(self):
         """確保 HTTP 會話存在"""
         if self._session is None or self._session.closed:
             timeout = aiohttp.ClientTimeout(total=self.timeout)
-            self._session = aiohttp.ClientSession(timeout=timeout)
+            if self._connector is not None:
+                connector, owner = self._connector, False
+            else:
+                connector = create_connector(self.config)
+                owner = True
+            self._session = aiohttp.ClientSession(
+                connector=connector, connector_owner=owner, timeout=timeout
+            )
+            if self._finalizer is not None:
+                self._finalizer.detach()
+            self._finalizer = weakref.finalize(
+                self, _warn_unclosed_session, self._session
+            )
     
     async def _close_session(self):
         """關閉 HTTP 會話"""
         if self._session and not self._session.closed:
             await self._session.close()
     
+    async def close(self) -> None:
+        """關閉客戶端並釋放連線池"""
+        await self._close_session()
+    
     async def _request(
         self, 
         method: str, 
         endpoint: str, 
         **kwargs
-    ) -> Dict[str, any]:
+    ) -> Dict[str, Any]:
         """發送 HTTP 請求"""
         await self._ensure_session()
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
@@ -71,7 +117,7 @@ class OllamaClient:
                         llm_type="ollama"
                     )
                 
-                return await response.json()
+                return serialization.loads(await response.read())
         
         except aiohttp.ClientError as e:
             raise MCPLLMError(
@@ -79,28 +125,43 @@ class OllamaClient:
                 llm_type="ollama"
             ) from e
     
-    async def list_models(self) -> List[ModelInfo]:
-        """列出可用模型"""
+    def invalidate_models_cache(self) -> None:
+        """清除模型列表快取"""
+        self._models_cache = None
+    
+    async def list_models(self, refresh: bool = False) -> List[ModelInfo]:
+        """列出可用模型（結果於 models_ttl 內快取）"""
+        if not refresh and self._models_cache is not None:
+            cached_at, cached_models = self._models_cache
+            if time.monotonic() - cached_at < self.models_ttl:
+                return list(cached_models)
+        
         try:
             response = await self._request("GET", "/api/tags")
             models = []
             
             for model_data in response.get("models", []):
+                details = model_data.get("details") or {}
                 model_info = ModelInfo(
                     name=model_data["name"],
                     size=model_data.get("size"),
                     digest=model_data.get("digest"),
                     modified_at=model_data.get("modified_at"),
                     details=model_data.get("details"),
-                    status=LLMStatus.AVAILABLE
+                    status=LLMStatus.AVAILABLE,
+                    capabilities=infer_capabilities(
+                        model_data["name"],
+                        details.get("families") or (details.get("family"),)
+                    )
                 )
                 models.append(model_info)
             
-            logger.info(f"Found {len(models)} available models")
-            return models
+            self._models_cache = (time.monotonic(), models)
+            logger.info("Found %s available models", len(models))
+            return list(models)
         
         except Exception as e:
-            logger.error(f"Failed to list models: {e}")
+            logger.error("Failed to list models: %s", e)
             raise MCPLLMError(
                 f"Failed to list models: {e}",
                 llm_type="ollama"
@@ -128,17 +189,19 @@ class OllamaClient:
                 async for line in response.content:
                     if line:
                         try:
-                            chunk_data = json.loads(line.decode())
+                            chunk_data = serialization.loads(line)
                             if chunk_data.get("status") == "success":
-                                logger.info(f"Successfully pulled model: {model_name}")
+                                self.invalidate_models_cache()
+                                logger.info("Successfully pulled model: %s", model_name)
                                 return True
-                        except json.JSONDecodeError:
+                        except serialization.JSONDecodeError:
                             continue
             
+            self.invalidate_models_cache()
             return True
         
         except Exception as e:
-            logger.error(f"Failed to pull model {model_name}: {e}")
+            logger.error("Failed to pull model %s: %s", model_name, e)
             raise MCPLLMError(
                 f"Failed to pull model {model_name}: {e}",
                 llm_type="ollama",
@@ -159,7 +222,12 @@ class OllamaClient:
             if request.options:
                 data["options"] = request.options
             
-            response = await self._request("POST", "/api/generate", json=data)
+            response = await self._request(
+                "POST",
+                "/api/generate",
+                data=serialization.dumps(data),
+                headers=_JSON_HEADERS,
+            )
             
             return LLMResponse(
                 content=response["response"],
@@ -176,7 +244,7 @@ class OllamaClient:
             )
         
         except Exception as e:
-            logger.error(f"Failed to generate text: {e}")
+            logger.error("Failed to generate text: %s", e)
             raise MCPLLMError(
                 f"Failed to generate text: {e}",
                 llm_type="ollama",
@@ -188,17 +256,20 @@ class OllamaClient:
         try:
             data = {
                 "model": request.model,
-                "messages": [
-                    {"role": msg.role, "content": msg.content}
-                    for msg in request.messages
-                ],
+                # ChatMessage dataclass 由序列化器直接編碼，無需逐筆轉為 dict
+                "messages": request.messages,
                 "stream": False,  # 目前只支援非流式
             }
             
             if request.options:
                 data["options"] = request.options
             
-            response = await self._request("POST", "/api/chat", json=data)
+            response = await self._request(
+                "POST",
+                "/api/chat",
+                data=serialization.dumps(data),
+                headers=_JSON_HEADERS,
+            )
             
             # 從回應中取得助理的回覆
             assistant_message = response["message"]
@@ -217,33 +288,65 @@ class OllamaClient:
             )
         
         except Exception as e:
-            logger.error(f"Failed to chat: {e}")
+            logger.error("Failed to chat: %s", e)
             raise MCPLLMError(
                 f"Failed to chat: {e}",
                 llm_type="ollama",
                 model_name=request.model
             ) from e
     
+    async def chat_stream(self, request: ChatRequest) -> AsyncIterator[str]:
+        """串流聊天對話，逐段產生回應文字（Ollama 以每行一個 JSON 物件回傳）
+        
+        呼叫端取得足夠內容後可提前結束迭代（建議搭配 contextlib.aclosing），
+        未讀完的回應會被釋放並關閉連線，Ollama 隨即停止生成。
+        """
+        data = {
+            "model": request.model,
+            "messages": request.messages,
+            "stream": True,
+        }
+        if request.options:
+            data["options"] = request.options
+        
+        await self._ensure_session()
+        url = f"{self.base_url}/api/chat"
+        
+        try:
+            async with self._session.post(
+                url, data=serialization.dumps(data), headers=_JSON_HEADERS
+            ) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise MCPLLMError(
+                        f"Ollama API error ({response.status}): {error_text}",
+                        llm_type="ollama",
+                        model_name=request.model
+                    )
+                
+                async for line in response.content:
+                    if not line.strip():
+                        continue
+                    chunk_data = serialization.loads(line)
+                    content = chunk_data.get("message", {}).get("content")
+                    if content:
+                        yield content
+                    if chunk_data.get("done"):
+                        break
+        
+        except aiohttp.ClientError as e:
+            raise MCPLLMError(
+                f"Failed to connect to Ollama: {e}",
+                llm_type="ollama",
+                model_name=request.model
+            ) from e
+    
     async def health_check(self) -> bool:
         """健康檢查"""
         try:
-            # 嘗試列出模型來檢查服務是否正常
-            await self.list_models()
+            # 使用輕量的版本端點，避免解析完整模型列表
+            await self._request("GET", "/api/version")
             return True
         except Exception as e:
-            logger.warning(f"Ollama health check failed: {e}")
+            logger.warning("Ollama health check failed: %s", e)
             return False
-    
-    def __del__(self):
-        """析構函數，確保會話被關閉"""
-        if self._session and not self._session.closed:
-            # 在事件循環中安排關閉會話
-            try:
-                loop = asyncio.get_event_loop()
-                if loop.is_running():
-                    loop.create_task(self._close_session())
-                else:
-                    loop.run_until_complete(self._close_session())
-            except RuntimeError:
-                # 如果沒有事件循環，就忽略
-                pass
\ No newline at end of file
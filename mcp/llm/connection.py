@@ -0,0 +1,25 @@
+"""
+LLM HTTP 連線池
+
+Ollama 與 LM Studio 客戶端（以及統一管理器的共用連線池）以相同的配置
+建立 TCPConnector，同一組設定在兩個後端上代表相同的意義。
+"""
+
+import aiohttp
+
+from ..config import MCPConfig
+
+
+def create_connector(config: MCPConfig) -> aiohttp.TCPConnector:
+    """依 LLM 連線池配置建立 TCPConnector
+    
+    併發請求複用 keep-alive 連線；limit_per_host 以主機計算，共用連線池時
+    各後端分別受限。DNS 結果快取 5 分鐘（預設 10 秒），新連線不必重複解析主機名稱。
+    """
+    return aiohttp.TCPConnector(
+        limit=100,
+        limit_per_host=config.llm_connections_per_host,
+        keepalive_timeout=config.llm_keepalive_timeout,
+        ttl_dns_cache=300,
+        enable_cleanup_closed=True,
+    )
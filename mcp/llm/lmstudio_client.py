@@ -5,33 +5,68 @@ LM Studio 客戶端
 LM Studio 提供與 OpenAI 相容的 API 介面。
 """
 
-import asyncio
-import json
 import logging
-from typing import Dict, List, Optional, Any
+import time
+import weakref
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 import aiohttp
 
-from ..config import get_config
+from .. import serialization
+from ..config import MCPConfig, get_config
 from ..exceptions import MCPLLMError
+from .connection import create_connector
 from .types import (
     ModelInfo, LLMResponse, ChatMessage, GenerateRequest, 
-    ChatRequest, LLMStatus
+    ChatRequest, LLMStatus, infer_capabilities
 )
 
 
 logger = logging.getLogger(__name__)
 
 
+def _warn_unclosed_session(session: aiohttp.ClientSession) -> None:
+    """客戶端被回收時若會話仍開啟則發出警告（不在 GC 期間操作事件循環）"""
+    if not session.closed:
+        logger.warning(
+            "LMStudioClient was garbage collected with an open session; "
+            "call 'await client.close()' explicitly"
+        )
+
+# 預先序列化的請求主體所使用的標頭
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# 回應缺少 usage 時使用的共用空字典（唯讀）
+_EMPTY: Dict[str, Any] = {}
+
+# chat 請求允許透傳給 LM Studio 的選項
+_ALLOWED_LMSTUDIO_OPTS = frozenset({
+    "temperature", "max_tokens", "top_p", "frequency_penalty"
+})
+
+
 class LMStudioClient:
     """LM Studio 客戶端"""
     
-    def __init__(self, host: Optional[str] = None, port: Optional[int] = None):
-        self.config = get_config()
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        config: Optional[MCPConfig] = None,
+        connector: Optional[aiohttp.BaseConnector] = None
+    ):
+        # 允許由管理器注入已解析的配置，避免每個實例各自查詢全域配置
+        self.config = config or get_config()
+        # 外部共用的連線池（由建立者負責關閉）；未提供時自行建立
+        self._connector = connector
         self.host = host or self.config.lmstudio_host
         self.port = port or self.config.lmstudio_port
         self.base_url = f"http://{self.host}:{self.port}"
         self.timeout = self.config.lmstudio_timeout
+        # 模型列表快取有效時間（秒）
+        self.models_ttl = self.config.model_list_ttl
         self._session: Optional[aiohttp.ClientSession] = None
+        self._finalizer: Optional[weakref.finalize] = None
+        self._models_cache: Optional[Tuple[float, List[ModelInfo]]] = None
     
     async def __aenter__(self):
         """異步上下文管理器入口"""
@@ -39,20 +74,39 @@ class LMStudioClient:
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """異步上下文管理器出口"""
-        await self._close_session()
+        """異步上下文管理器出口
+
+        長期持有會話的呼叫端（如統一管理器）不使用上下文管理器，而是明確呼叫 close()。
+        """
+        await self.close()
     
     async def _ensure_session(self):
         """確保 HTTP 會話存在"""
         if self._session is None or self._session.closed:
             timeout = aiohttp.ClientTimeout(total=self.timeout)
-            self._session = aiohttp.ClientSession(timeout=timeout)
+            if self._connector is not None:
+                connector, owner = self._connector, False
+            else:
+                connector = create_connector(self.config)
+                owner = True
+            self._session = aiohttp.ClientSession(
+                connector=connector, connector_owner=owner, timeout=timeout
+            )
+            if self._finalizer is not None:
+                self._finalizer.detach()
+            self._finalizer = weakref.finalize(
+                self, _warn_unclosed_session, self._session
+            )
     
     async def _close_session(self):
         """關閉 HTTP 會話"""
         if self._session and not self._session.closed:
             await self._session.close()
     
+    async def close(self) -> None:
+        """關閉客戶端並釋放連線池"""
+        await self._close_session()
+    
     async def _request(
         self, 
         method: str, 
@@ -72,7 +126,7 @@ class LMStudioClient:
                         llm_type="lmstudio"
                     )
                 
-                return await response.json()
+                return serialization.loads(await response.read())
         
         except aiohttp.ClientError as e:
             raise MCPLLMError(
@@ -80,8 +134,17 @@ class LMStudioClient:
                 llm_type="lmstudio"
             ) from e
     
-    async def list_models(self) -> List[ModelInfo]:
-        """列出可用模型"""
+    def invalidate_models_cache(self) -> None:
+        """清除模型列表快取"""
+        self._models_cache = None
+    
+    async def list_models(self, refresh: bool = False) -> List[ModelInfo]:
+        """列出可用模型（結果於 models_ttl 內快取）"""
+        if not refresh and self._models_cache is not None:
+            cached_at, cached_models = self._models_cache
+            if time.monotonic() - cached_at < self.models_ttl:
+                return list(cached_models)
+        
         try:
             response = await self._request("GET", "/v1/models")
             models = []
@@ -96,12 +159,14 @@ class LMStudioClient:
                         "object": model_data.get("object"),
                         "owned_by": model_data.get("owned_by", "lmstudio")
                     },
-                    status=LLMStatus.AVAILABLE
+                    status=LLMStatus.AVAILABLE,
+                    capabilities=infer_capabilities(model_data["id"])
                 )
                 models.append(model_info)
             
+            self._models_cache = (time.monotonic(), models)
             logger.info(f"Found {len(models)} available models in LM Studio")
-            return models
+            return list(models)
         
         except Exception as e:
             logger.error(f"Failed to list LM Studio models: {e}")
@@ -124,31 +189,45 @@ class LMStudioClient:
         
         return await self.chat(chat_request)
     
+    def _chat_payload(self, request: ChatRequest, stream: bool) -> bytes:
+        """建立聊天請求主體"""
+        data = {
+            "model": request.model,
+            # ChatMessage dataclass 由序列化器直接編碼，無需逐筆轉為 dict
+            "messages": request.messages,
+            "stream": stream,
+            "temperature": 0.7,
+            "max_tokens": -1,
+        }
+        
+        # 添加額外選項
+        if request.options:
+            data |= {
+                key: value for key, value in request.options.items()
+                if key in _ALLOWED_LMSTUDIO_OPTS
+            }
+        
+        # 多輪對話要求 llama.cpp 系列後端保留提示的 KV 快取，下一輪只需
+        # 處理新增的訊息；不支援此欄位的伺服器會忽略它
+        if request.conversation_id is not None:
+            data["cache_prompt"] = True
+        
+        return serialization.dumps(data)
+    
     async def chat(self, request: ChatRequest) -> LLMResponse:
         """聊天對話"""
         try:
-            data = {
-                "model": request.model,
-                "messages": [
-                    {"role": msg.role, "content": msg.content}
-                    for msg in request.messages
-                ],
-                "stream": False,
-                "temperature": 0.7,
-                "max_tokens": -1,
-            }
-            
-            # 添加額外選項
-            if request.options:
-                for key, value in request.options.items():
-                    if key in ["temperature", "max_tokens", "top_p", "frequency_penalty"]:
-                        data[key] = value
-            
-            response = await self._request("POST", "/v1/chat/completions", json=data)
+            response = await self._request(
+                "POST",
+                "/v1/chat/completions",
+                data=self._chat_payload(request, stream=False),
+                headers=_JSON_HEADERS,
+            )
             
             # 解析 OpenAI 格式的回應
             choice = response["choices"][0]
             message = choice["message"]
+            usage = response.get("usage") or _EMPTY
             
             return LLMResponse(
                 content=message["content"],
@@ -157,9 +236,9 @@ class LMStudioClient:
                 done=choice.get("finish_reason") == "stop",
                 total_duration=None,  # LM Studio 不提供詳細時間
                 load_duration=None,
-                prompt_eval_count=response.get("usage", {}).get("prompt_tokens"),
+                prompt_eval_count=usage.get("prompt_tokens"),
                 prompt_eval_duration=None,
-                eval_count=response.get("usage", {}).get("completion_tokens"),
+                eval_count=usage.get("completion_tokens"),
                 eval_duration=None,
                 context=None
             )
@@ -172,12 +251,57 @@ class LMStudioClient:
                 model_name=request.model
             ) from e
     
+    async def chat_stream(self, request: ChatRequest) -> AsyncIterator[str]:
+        """串流聊天對話，逐段產生回應文字（OpenAI 相容的 SSE 格式）
+        
+        呼叫端取得足夠內容後可提前結束迭代（建議搭配 contextlib.aclosing），
+        未讀完的回應會被釋放並關閉連線，LM Studio 隨即停止生成。
+        """
+        await self._ensure_session()
+        url = f"{self.base_url}/v1/chat/completions"
+        
+        try:
+            async with self._session.post(
+                url,
+                data=self._chat_payload(request, stream=True),
+                headers=_JSON_HEADERS,
+            ) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise MCPLLMError(
+                        f"LM Studio API error ({response.status}): {error_text}",
+                        llm_type="lmstudio",
+                        model_name=request.model
+                    )
+                
+                async for line in response.content:
+                    if not line.startswith(b"data:"):
+                        continue
+                    payload = line[5:].strip()
+                    if payload == b"[DONE]":
+                        break
+                    
+                    choices = serialization.loads(payload).get("choices")
+                    if not choices:
+                        continue
+                    content = (choices[0].get("delta") or _EMPTY).get("content")
+                    if content:
+                        yield content
+        
+        except aiohttp.ClientError as e:
+            raise MCPLLMError(
+                f"Failed to connect to LM Studio: {e}",
+                llm_type="lmstudio",
+                model_name=request.model
+            ) from e
+    
     async def health_check(self) -> bool:
         """健康檢查"""
         try:
-            # 嘗試列出模型來檢查服務是否正常
-            await self.list_models()
-            return True
+            # 只檢查狀態碼，不解析回應主體或建立 ModelInfo
+            await self._ensure_session()
+            async with self._session.get(f"{self.base_url}/v1/models") as response:
+                return response.status == 200
         except Exception as e:
             logger.warning(f"LM Studio health check failed: {e}")
             return False
@@ -192,15 +316,3 @@ class LMStudioClient:
             return None
         except Exception:
             return None
-    
-    def __del__(self):
-        """析構函數，確保會話被關閉"""
-        if self._session and not self._session.closed:
-            try:
-                loop = asyncio.get_event_loop()
-                if loop.is_running():
-                    loop.create_task(self._close_session())
-                else:
-                    loop.run_until_complete(self._close_session())
-            except RuntimeError:
-                pass
\ No newline at end of file
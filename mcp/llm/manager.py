@@ -6,10 +6,11 @@
 
 import asyncio
 import logging
-from typing import Dict, List, Optional
-from datetime import datetime, timedelta
+import time
+from typing import Any, Dict, List, Optional
+from datetime import datetime
 
-from ..config import get_config
+from ..config import MCPConfig, get_config
 from ..exceptions import MCPLLMError
 from .client import OllamaClient
 from .types import ModelInfo, LLMResponse, ChatMessage, GenerateRequest, ChatRequest
@@ -21,11 +22,16 @@ logger = logging.getLogger(__name__)
 class ModelManager:
     """模型管理器"""
     
-    def __init__(self, client: Optional[OllamaClient] = None):
-        self.config = get_config()
-        self.client = client or OllamaClient()
+    def __init__(
+        self,
+        client: Optional[OllamaClient] = None,
+        config: Optional[MCPConfig] = None
+    ):
+        self.config = config or get_config()
+        self.client = client or OllamaClient(config=self.config)
         self._available_models: Dict[str, ModelInfo] = {}
-        self._model_cache: Dict[str, datetime] = {}
+        # 模型最後使用時間（time.monotonic() 秒數）
+        self._model_cache: Dict[str, float] = {}
         self._lock = asyncio.Lock()
         self._initialized = False
     
@@ -49,10 +55,9 @@ class ModelManager:
     async def _refresh_available_models(self) -> None:
         """刷新可用模型列表"""
         try:
-            async with self.client:
-                models = await self.client.list_models()
-                self._available_models = {model.name: model for model in models}
-                logger.info(f"Refreshed {len(models)} available models")
+            models = await self.client.list_models()
+            self._available_models = {model.name: model for model in models}
+            logger.info(f"Refreshed {len(models)} available models")
         except Exception as e:
             logger.error(f"Failed to refresh models: {e}")
             raise
@@ -86,15 +91,14 @@ class ModelManager:
         # 嘗試拉取模型
         try:
             logger.info(f"Pulling model: {model_name}")
-            async with self.client:
-                success = await self.client.pull_model(model_name)
+            success = await self.client.pull_model(model_name)
                 
-                if success:
-                    # 刷新模型列表
-                    await self._refresh_available_models()
-                    return model_name in self._available_models
+            if success:
+                # 刷新模型列表
+                await self._refresh_available_models()
+                return model_name in self._available_models
                 
-                return False
+            return False
         
         except Exception as e:
             logger.error(f"Failed to pull model {model_name}: {e}")
@@ -105,7 +109,7 @@ class ModelManager:
         model_name: str, 
         prompt: str,
         context: Optional[List[int]] = None,
-        options: Optional[Dict[str, any]] = None
+        options: Optional[Dict[str, Any]] = None
     ) -> LLMResponse:
         """生成文本"""
         # 確保模型可用
@@ -117,7 +121,7 @@ class ModelManager:
             )
         
         # 更新模型使用時間
-        self._model_cache[model_name] = datetime.now()
+        self._model_cache[model_name] = time.monotonic()
         
         # 建立生成請求
         request = GenerateRequest(
@@ -128,10 +132,9 @@ class ModelManager:
         )
         
         try:
-            async with self.client:
-                response = await self.client.generate(request)
-                logger.debug(f"Generated text for model {model_name}")
-                return response
+            response = await self.client.generate(request)
+            logger.debug(f"Generated text for model {model_name}")
+            return response
         
         except Exception as e:
             logger.error(f"Failed to generate text with model {model_name}: {e}")
@@ -141,7 +144,7 @@ class ModelManager:
         self,
         model_name: str,
         messages: List[ChatMessage],
-        options: Optional[Dict[str, any]] = None
+        options: Optional[Dict[str, Any]] = None
     ) -> LLMResponse:
         """聊天對話"""
         # 確保模型可用
@@ -153,7 +156,7 @@ class ModelManager:
             )
         
         # 更新模型使用時間
-        self._model_cache[model_name] = datetime.now()
+        self._model_cache[model_name] = time.monotonic()
         
         # 建立聊天請求
         request = ChatRequest(
@@ -163,10 +166,9 @@ class ModelManager:
         )
         
         try:
-            async with self.client:
-                response = await self.client.chat(request)
-                logger.debug(f"Chat completed for model {model_name}")
-                return response
+            response = await self.client.chat(request)
+            logger.debug(f"Chat completed for model {model_name}")
+            return response
         
         except Exception as e:
             logger.error(f"Failed to chat with model {model_name}: {e}")
@@ -205,22 +207,26 @@ class ModelManager:
     async def health_check(self) -> bool:
         """健康檢查"""
         try:
-            async with self.client:
-                return await self.client.health_check()
+            return await self.client.health_check()
         except Exception as e:
             logger.error(f"Model manager health check failed: {e}")
             return False
     
     def get_model_usage_stats(self) -> Dict[str, datetime]:
-        """取得模型使用統計"""
-        return self._model_cache.copy()
+        """取得模型使用統計（僅在查詢時換算為牆上時間）"""
+        # 以當前牆上時間與單調時鐘的差值換算各模型的最後使用時間
+        offset = time.time() - time.monotonic()
+        return {
+            model_name: datetime.fromtimestamp(offset + last_used)
+            for model_name, last_used in self._model_cache.items()
+        }
     
     def cleanup_unused_models(self, hours: int = 24) -> List[str]:
         """清理未使用的模型（僅標記，實際清理需要額外實作）"""
-        cutoff_time = datetime.now() - timedelta(hours=hours)
+        cutoff = time.monotonic() - hours * 3600
         unused_models = [
             model_name for model_name, last_used in self._model_cache.items()
-            if last_used < cutoff_time
+            if last_used < cutoff
         ]
         
         logger.info(f"Found {len(unused_models)} unused models")
@@ -231,5 +237,6 @@ class ModelManager:
         async with self._lock:
             self._available_models.clear()
             self._model_cache.clear()
+            await self.client.close()
             self._initialized = False
             logger.info("Model manager cleaned up")
\ No newline at end of file
@@ -0,0 +1,65 @@
+"""
+LLM 回應快取
+
+以完全相同的請求內容（模型、訊息、選項與對話 ID）為鍵，於行程內快取聊天回應，
+重複的提示可直接返回而不必再次呼叫後端。採 LRU 淘汰並設有存活時間。
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .. import serialization
+from .types import ChatMessage, LLMResponse
+
+
+class ResponseCache:
+    """LRU + TTL 的聊天回應快取（LLMResponse 為不可變物件，可直接共用）"""
+    
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[bytes, Tuple[float, LLMResponse]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(
+        model_name: str,
+        messages: List[ChatMessage],
+        options: Optional[Dict[str, Any]] = None,
+        conversation_id: Optional[str] = None
+    ) -> bytes:
+        """以序列化後的請求內容作為快取鍵"""
+        return serialization.dumps([model_name, messages, options, conversation_id])
+    
+    def get(self, key: bytes) -> Optional[LLMResponse]:
+        """取得未過期的回應，並標記為最近使用"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        stored_at, response = entry
+        if time.monotonic() - stored_at >= self.ttl:
+            del self._entries[key]
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return response
+    
+    def put(self, key: bytes, response: LLMResponse) -> None:
+        """存入回應，超過容量時淘汰最久未使用的項目"""
+        self._entries[key] = (time.monotonic(), response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """清除所有快取項目"""
+        self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
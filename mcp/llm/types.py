@@ -4,7 +4,7 @@ MCP LLM 類型定義
 定義 LLM 整合中使用的各種類型。
 """
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
@@ -17,7 +17,7 @@ class LLMStatus(Enum):
     OFFLINE = "offline"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ModelInfo:
     """模型資訊"""
     name: str
@@ -26,9 +26,25 @@ class ModelInfo:
     modified_at: Optional[str] = None
     details: Optional[Dict[str, Any]] = None
     status: LLMStatus = LLMStatus.AVAILABLE
+    # 模型能力（如 "chat"、"embedding"）；以 tuple 保存以維持可序列化，空值表示未知
+    capabilities: Tuple[str, ...] = ()
 
 
-@dataclass
+# 嵌入模型常見的架構家族（Ollama 的 details.families）
+_EMBEDDING_FAMILIES = frozenset({"bert", "nomic-bert"})
+
+
+def infer_capabilities(model_name: str, families: Iterable[str] = ()) -> Tuple[str, ...]:
+    """由模型名稱與架構家族推斷模型能力
+    
+    後端的模型列表不直接提供能力資訊；嵌入模型無法用於對話，其餘視為對話模型。
+    """
+    if "embed" in model_name.lower() or not _EMBEDDING_FAMILIES.isdisjoint(families):
+        return ("embedding",)
+    return ("chat",)
+
+
+@dataclass(slots=True, frozen=True)
 class LLMResponse:
     """LLM 回應"""
     content: str
@@ -44,14 +60,14 @@ class LLMResponse:
     context: Optional[List[int]] = None
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ChatMessage:
     """聊天訊息"""
     role: str  # "system", "user", "assistant"
     content: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class GenerateRequest:
     """生成請求"""
     model: str
@@ -61,10 +77,12 @@ class GenerateRequest:
     options: Optional[Dict[str, Any]] = None
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ChatRequest:
     """聊天請求"""
     model: str
     messages: List[ChatMessage]
     stream: bool = False
-    options: Optional[Dict[str, Any]] = None
\ No newline at end of file
+    options: Optional[Dict[str, Any]] = None
+    # 多輪對話的識別碼；設定時後端會盡量重用前幾輪的提示快取
+    conversation_id: Optional[str] = None
\ No newline at end of file
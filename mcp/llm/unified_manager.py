@@ -5,15 +5,24 @@
 """
 
 import asyncio
+import contextlib
+import dataclasses
+import functools
 import logging
-from typing import Dict, List, Optional, Union, Any
-from datetime import datetime, timedelta
+import time
+from typing import (
+    Any, AsyncContextManager, AsyncIterator, Awaitable, Callable, Dict, List,
+    Optional, Tuple, Union
+)
 from enum import Enum
+import aiohttp
 
 from ..config import get_config
 from ..exceptions import MCPLLMError
 from .client import OllamaClient
+from .connection import create_connector
 from .lmstudio_client import LMStudioClient
+from .response_cache import ResponseCache
 from .types import ModelInfo, LLMResponse, ChatMessage, GenerateRequest, ChatRequest
 
 
@@ -27,6 +36,20 @@ class LLMServiceType(Enum):
     AUTO = "auto"
 
 
+# 日誌中使用的服務顯示名稱
+_SERVICE_LABELS = {
+    LLMServiceType.OLLAMA: "Ollama",
+    LLMServiceType.LMSTUDIO: "LM Studio",
+}
+
+# 模型名稱的服務前綴
+_OLLAMA_PREFIX = "ollama:"
+_LMSTUDIO_PREFIX = "lmstudio:"
+
+# 未設定每模型並行上限時使用的空上下文（nullcontext 可重複進入且支援 async with）
+_NO_LIMIT = contextlib.nullcontext()
+
+
 class UnifiedModelManager:
     """統一模型管理器"""
     
@@ -35,9 +58,30 @@ class UnifiedModelManager:
         self.preferred_service = preferred_service
         self._ollama_client: Optional[OllamaClient] = None
         self._lmstudio_client: Optional[LMStudioClient] = None
+        # 兩個後端客戶端共用的連線池，由管理器負責關閉
+        self._connector: Optional[aiohttp.TCPConnector] = None
         self._available_services: Dict[LLMServiceType, bool] = {}
+        # 對外的服務狀態視圖（不含 AUTO），於檢查可用性後重建
+        self._available_services_view: Dict[str, bool] = {}
         self._service_models: Dict[LLMServiceType, List[ModelInfo]] = {}
-        self._model_cache: Dict[str, datetime] = {}
+        # 模型最後使用時間（time.monotonic() 秒數）
+        self._model_cache: Dict[str, float] = {}
+        # 依完整名稱（含服務前綴）索引的模型，於刷新時重建
+        self._model_index: Dict[str, ModelInfo] = {}
+        self._recommended_model: Optional[str] = None
+        # 扁平化的模型列表快取，於刷新時重建，超過 model_list_ttl 視為過期
+        self._all_models_cache: Optional[Tuple[ModelInfo, ...]] = None
+        self._all_models_cached_at: float = 0.0
+        # 每個 (服務, 模型) 的並行請求上限，避免對單 GPU 後端無效地擴散請求
+        self._inflight: Dict[Tuple[LLMServiceType, str], asyncio.Semaphore] = {}
+        # 進行中的共享操作（single-flight），同一鍵的並行呼叫共用同一任務
+        self._pending: Dict[str, asyncio.Future] = {}
+        # 相同聊天請求的回應快取（需同時啟用 enable_cache 與 enable_response_cache）
+        self._response_cache: Optional[ResponseCache] = (
+            ResponseCache(self.config.cache_max_size, self.config.cache_ttl)
+            if self.config.enable_cache and self.config.enable_response_cache
+            else None
+        )
         self._lock = asyncio.Lock()
         self._initialized = False
     
@@ -48,9 +92,17 @@ class UnifiedModelManager:
                 return
             
             try:
-                # 初始化客戶端
-                self._ollama_client = OllamaClient()
-                self._lmstudio_client = LMStudioClient()
+                # 初始化客戶端（共用已解析的配置與同一連線池）
+                self._connector = create_connector(self.config)
+                self._ollama_client = OllamaClient(
+                    config=self.config, connector=self._connector
+                )
+                self._lmstudio_client = LMStudioClient(
+                    config=self.config, connector=self._connector
+                )
+                # 預先建立長期持有的會話，後續呼叫直接複用
+                await self._ollama_client._ensure_session()
+                await self._lmstudio_client._ensure_session()
                 
                 # 檢查服務可用性
                 await self._check_service_availability()
@@ -75,88 +127,179 @@ class UnifiedModelManager:
                     llm_type="unified"
                 ) from e
     
+    def _service_clients(self) -> Tuple[Tuple[LLMServiceType, Any], ...]:
+        """依固定順序列出各服務及其客戶端"""
+        return (
+            (LLMServiceType.OLLAMA, self._ollama_client),
+            (LLMServiceType.LMSTUDIO, self._lmstudio_client),
+        )
+    
     async def _check_service_availability(self) -> None:
-        """檢查所有服務的可用性"""
-        # 檢查 Ollama
-        try:
-            ollama_healthy = await self._ollama_client.health_check()
-            self._available_services[LLMServiceType.OLLAMA] = ollama_healthy
-            if ollama_healthy:
-                logger.info("Ollama service is available")
-        except Exception as e:
-            logger.warning(f"Ollama service not available: {e}")
-            self._available_services[LLMServiceType.OLLAMA] = False
+        """並行檢查所有服務的可用性"""
+        async def check(service_type: LLMServiceType, client: Any) -> bool:
+            label = _SERVICE_LABELS[service_type]
+            try:
+                healthy = await client.health_check()
+            except Exception as e:
+                logger.warning(f"{label} service not available: {e}")
+                return False
+            if healthy:
+                logger.info(f"{label} service is available")
+            return healthy
         
-        # 檢查 LM Studio
-        try:
-            lmstudio_healthy = await self._lmstudio_client.health_check()
-            self._available_services[LLMServiceType.LMSTUDIO] = lmstudio_healthy
-            if lmstudio_healthy:
-                logger.info("LM Studio service is available")
-        except Exception as e:
-            logger.warning(f"LM Studio service not available: {e}")
-            self._available_services[LLMServiceType.LMSTUDIO] = False
+        services = self._service_clients()
+        results = await asyncio.gather(
+            *(check(service_type, client) for service_type, client in services)
+        )
+        # 依固定順序寫入，確保自動選擇服務時的優先順序不受完成順序影響
+        for (service_type, _), healthy in zip(services, results):
+            self._available_services[service_type] = healthy
+        self._available_services_view = {
+            service.value: available
+            for service, available in self._available_services.items()
+            if service is not LLMServiceType.AUTO
+        }
     
     async def _refresh_all_models(self) -> None:
-        """刷新所有服務的模型列表"""
-        # 獲取 Ollama 模型
-        if self._available_services.get(LLMServiceType.OLLAMA, False):
+        """並行刷新所有服務的模型列表"""
+        async def load(service_type: LLMServiceType, client: Any) -> List[ModelInfo]:
+            label = _SERVICE_LABELS[service_type]
             try:
-                async with self._ollama_client:
-                    ollama_models = await self._ollama_client.list_models()
-                    # 為模型名稱添加服務前綴
-                    for model in ollama_models:
-                        model.name = f"ollama:{model.name}"
-                    self._service_models[LLMServiceType.OLLAMA] = ollama_models
-                    logger.info(f"Loaded {len(ollama_models)} Ollama models")
+                # 為模型名稱添加服務前綴（建立新實例，避免修改客戶端快取）
+                models = [
+                    dataclasses.replace(
+                        model, name=f"{service_type.value}:{model.name}"
+                    )
+                    # 管理器自身有快取，刷新時略過客戶端快取以取得最新列表
+                    for model in await client.list_models(refresh=True)
+                ]
             except Exception as e:
-                logger.error(f"Failed to load Ollama models: {e}")
-                self._service_models[LLMServiceType.OLLAMA] = []
+                logger.error(f"Failed to load {label} models: {e}")
+                return []
+            logger.info(f"Loaded {len(models)} {label} models")
+            return models
         
-        # 獲取 LM Studio 模型
-        if self._available_services.get(LLMServiceType.LMSTUDIO, False):
-            try:
-                async with self._lmstudio_client:
-                    lmstudio_models = await self._lmstudio_client.list_models()
-                    # 為模型名稱添加服務前綴
-                    for model in lmstudio_models:
-                        model.name = f"lmstudio:{model.name}"
-                    self._service_models[LLMServiceType.LMSTUDIO] = lmstudio_models
-                    logger.info(f"Loaded {len(lmstudio_models)} LM Studio models")
-            except Exception as e:
-                logger.error(f"Failed to load LM Studio models: {e}")
-                self._service_models[LLMServiceType.LMSTUDIO] = []
+        services = tuple(
+            (service_type, client)
+            for service_type, client in self._service_clients()
+            if self._available_services.get(service_type, False)
+        )
+        results = await asyncio.gather(
+            *(load(service_type, client) for service_type, client in services)
+        )
+        for (service_type, _), models in zip(services, results):
+            self._service_models[service_type] = models
+        
+        self._rebuild_model_index()
+    
+    def _rebuild_model_index(self) -> None:
+        """重建模型索引和推薦模型快取"""
+        self._model_index = {
+            model.name: model
+            for service_models in self._service_models.values()
+            for model in service_models
+        }
+        self._recommended_model = self._select_recommended_model()
+        self._all_models_cache = tuple(
+            model
+            for service_models in self._service_models.values()
+            for model in service_models
+        )
+        self._all_models_cached_at = time.monotonic()
+    
+    def _select_recommended_model(self) -> Optional[str]:
+        """依偏好順序挑選推薦模型"""
+        # 嵌入模型無法用於對話，不列入推薦
+        candidates = [
+            name for name, model in self._model_index.items()
+            if "embedding" not in model.capabilities
+        ]
+        if not candidates:
+            return None
+        
+        # 優先推薦 LM Studio 中的 DeepSeek 模型
+        for name in candidates:
+            if "lmstudio" in name and "deepseek" in name.lower():
+                return name
+        
+        # 其次推薦任何 LM Studio 模型
+        for name in candidates:
+            if "lmstudio" in name:
+                return name
+        
+        # 最後推薦第一個可用模型
+        return candidates[0]
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _parse_prefix(model_name: str) -> Tuple[Optional[LLMServiceType], str]:
+        """解析模型名稱的服務前綴（純函數，結果可快取）"""
+        if model_name.startswith(_OLLAMA_PREFIX):
+            return LLMServiceType.OLLAMA, model_name[len(_OLLAMA_PREFIX):]
+        if model_name.startswith(_LMSTUDIO_PREFIX):
+            return LLMServiceType.LMSTUDIO, model_name[len(_LMSTUDIO_PREFIX):]
+        return None, model_name
+    
+    async def _single_flight(
+        self, key: str, factory: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """合併同一鍵的並行呼叫，只實際執行一次"""
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        # shield 確保單一呼叫端被取消時不影響其他等待者
+        return await asyncio.shield(task)
+    
+    def _model_semaphore(
+        self, service_type: LLMServiceType, model_name: str
+    ) -> AsyncContextManager[Any]:
+        """取得 (服務, 模型) 對應的並行限制信號量
+        
+        max_concurrent_per_model 為 0 時不限制並行，返回不做任何事的上下文。
+        """
+        if self.config.max_concurrent_per_model <= 0:
+            return _NO_LIMIT
+        key = (service_type, model_name)
+        sem = self._inflight.get(key)
+        if sem is None:
+            sem = self._inflight[key] = asyncio.Semaphore(
+                self.config.max_concurrent_per_model
+            )
+        return sem
     
     def _parse_model_name(self, model_name: str) -> tuple[LLMServiceType, str]:
         """解析模型名稱，返回服務類型和實際模型名稱"""
-        if model_name.startswith("ollama:"):
-            return LLMServiceType.OLLAMA, model_name[7:]  # 移除 "ollama:" 前綴
-        elif model_name.startswith("lmstudio:"):
-            return LLMServiceType.LMSTUDIO, model_name[9:]  # 移除 "lmstudio:" 前綴
-        else:
-            # 沒有前綴，使用偏好服務或自動選擇
-            if self.preferred_service != LLMServiceType.AUTO:
-                return self.preferred_service, model_name
-            else:
-                # 自動選擇第一個可用服務
-                for service, available in self._available_services.items():
-                    if available and service != LLMServiceType.AUTO:
-                        return service, model_name
-                raise MCPLLMError("No available LLM service", llm_type="unified")
+        service_type, actual_name = self._parse_prefix(model_name)
+        if service_type is not None:
+            return service_type, actual_name
+        
+        # 沒有前綴，使用偏好服務或自動選擇
+        if self.preferred_service != LLMServiceType.AUTO:
+            return self.preferred_service, model_name
+        
+        # 自動選擇第一個可用服務
+        for service, available in self._available_services.items():
+            if available and service != LLMServiceType.AUTO:
+                return service, model_name
+        raise MCPLLMError("No available LLM service", llm_type="unified")
     
     async def list_models(self, refresh: bool = False) -> List[ModelInfo]:
         """列出所有可用模型"""
         if not self._initialized:
             await self.initialize()
         
-        if refresh:
-            await self._refresh_all_models()
-        
-        all_models = []
-        for service_models in self._service_models.values():
-            all_models.extend(service_models)
+        if (
+            refresh
+            or self._all_models_cache is None
+            or time.monotonic() - self._all_models_cached_at > self.config.model_list_ttl
+        ):
+            await self._single_flight("models", self._refresh_all_models)
         
-        return all_models
+        # _refresh_all_models 必定寫入快取，此處僅為型別收窄
+        assert self._all_models_cache is not None
+        return list(self._all_models_cache)
     
     async def get_model_info(self, model_name: str) -> Optional[ModelInfo]:
         """取得模型資訊"""
@@ -164,13 +307,7 @@ class UnifiedModelManager:
             await self.initialize()
         
         service_type, actual_name = self._parse_model_name(model_name)
-        
-        service_models = self._service_models.get(service_type, [])
-        for model in service_models:
-            if actual_name in model.name:
-                return model
-        
-        return None
+        return self._model_index.get(f"{service_type.value}:{actual_name}")
     
     async def generate_text(
         self, 
@@ -192,7 +329,7 @@ class UnifiedModelManager:
             )
         
         # 更新模型使用時間
-        self._model_cache[model_name] = datetime.now()
+        self._model_cache[model_name] = time.monotonic()
         
         # 建立生成請求
         request = GenerateRequest(
@@ -203,14 +340,15 @@ class UnifiedModelManager:
         
         try:
             if service_type == LLMServiceType.OLLAMA:
-                async with self._ollama_client:
-                    response = await self._ollama_client.generate(request)
+                client = self._ollama_client
             elif service_type == LLMServiceType.LMSTUDIO:
-                async with self._lmstudio_client:
-                    response = await self._lmstudio_client.generate(request)
+                client = self._lmstudio_client
             else:
                 raise MCPLLMError(f"Unsupported service type: {service_type}")
             
+            async with self._model_semaphore(service_type, actual_name):
+                response = await client.generate(request)
+            
             logger.debug(f"Generated text using {service_type.value}:{actual_name}")
             return response
         
@@ -222,9 +360,13 @@ class UnifiedModelManager:
         self,
         model_name: str,
         messages: List[ChatMessage],
-        options: Optional[Dict[str, Any]] = None
+        options: Optional[Dict[str, Any]] = None,
+        conversation_id: Optional[str] = None
     ) -> LLMResponse:
-        """聊天對話"""
+        """聊天對話
+        
+        多輪對話的每一輪請傳入相同的 conversation_id，讓後端重用前幾輪的提示快取。
+        """
         if not self._initialized:
             await self.initialize()
         
@@ -238,25 +380,41 @@ class UnifiedModelManager:
             )
         
         # 更新模型使用時間
-        self._model_cache[model_name] = datetime.now()
+        self._model_cache[model_name] = time.monotonic()
+        
+        cache = self._response_cache
+        cache_key = None
+        if cache is not None:
+            cache_key = ResponseCache.make_key(
+                model_name, messages, options, conversation_id
+            )
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.debug("Chat response served from cache for %s", model_name)
+                return cached
         
         # 建立聊天請求
         request = ChatRequest(
             model=actual_name,
             messages=messages,
-            options=options
+            options=options,
+            conversation_id=conversation_id
         )
         
         try:
             if service_type == LLMServiceType.OLLAMA:
-                async with self._ollama_client:
-                    response = await self._ollama_client.chat(request)
+                client = self._ollama_client
             elif service_type == LLMServiceType.LMSTUDIO:
-                async with self._lmstudio_client:
-                    response = await self._lmstudio_client.chat(request)
+                client = self._lmstudio_client
             else:
                 raise MCPLLMError(f"Unsupported service type: {service_type}")
             
+            async with self._model_semaphore(service_type, actual_name):
+                response = await client.chat(request)
+            
+            if cache is not None and cache_key is not None:
+                cache.put(cache_key, response)
+            
             logger.debug(f"Chat completed using {service_type.value}:{actual_name}")
             return response
         
@@ -264,70 +422,153 @@ class UnifiedModelManager:
             logger.error(f"Failed to chat with {service_type.value}: {e}")
             raise
     
-    async def get_available_services(self) -> Dict[str, bool]:
-        """取得可用服務狀態"""
+    async def warmup(self, model_name: str) -> None:
+        """預熱模型：送出僅生成一個 token 的請求，讓後端先完成模型載入
+        
+        首次請求常包含模型載入與 KV 快取配置的時間，量測回應時間前先預熱，
+        取得的才是穩定狀態的延遲。預熱請求不經過回應快取。
+        """
         if not self._initialized:
             await self.initialize()
         
-        return {
-            service.value: available 
-            for service, available in self._available_services.items()
-            if service != LLMServiceType.AUTO
-        }
+        service_type, actual_name = self._parse_model_name(model_name)
+        
+        if not self._available_services.get(service_type, False):
+            raise MCPLLMError(
+                f"Service {service_type.value} is not available",
+                llm_type=service_type.value,
+                model_name=model_name
+            )
+        
+        if service_type == LLMServiceType.OLLAMA:
+            client = self._ollama_client
+            options = {"num_predict": 1, "temperature": 0}
+        elif service_type == LLMServiceType.LMSTUDIO:
+            client = self._lmstudio_client
+            options = {"max_tokens": 1, "temperature": 0}
+        else:
+            raise MCPLLMError(f"Unsupported service type: {service_type}")
+        
+        request = ChatRequest(
+            model=actual_name,
+            messages=[ChatMessage(role="user", content="hi")],
+            options=options
+        )
+        
+        async with self._model_semaphore(service_type, actual_name):
+            await client.chat(request)
+        
+        self._model_cache[model_name] = time.monotonic()
+        logger.debug(f"Warmed up {service_type.value}:{actual_name}")
     
-    async def get_recommended_model(self) -> Optional[str]:
-        """取得推薦的模型"""
+    async def chat_stream(
+        self,
+        model_name: str,
+        messages: List[ChatMessage],
+        options: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """串流聊天對話，逐段產生回應文字
+        
+        呼叫端取得足夠內容後可提前結束迭代（建議搭配 contextlib.aclosing），
+        底層 HTTP 回應隨即關閉，後端停止生成並釋放該模型的並行名額。
+        串流回應不寫入回應快取。
+        """
         if not self._initialized:
             await self.initialize()
         
-        all_models = await self.list_models()
+        service_type, actual_name = self._parse_model_name(model_name)
         
-        if not all_models:
-            return None
+        if not self._available_services.get(service_type, False):
+            raise MCPLLMError(
+                f"Service {service_type.value} is not available",
+                llm_type=service_type.value,
+                model_name=model_name
+            )
         
-        # 優先推薦 LM Studio 中的 DeepSeek 模型
-        for model in all_models:
-            if "lmstudio" in model.name and "deepseek" in model.name.lower():
-                return model.name
+        # 更新模型使用時間
+        self._model_cache[model_name] = time.monotonic()
         
-        # 其次推薦任何 LM Studio 模型
-        for model in all_models:
-            if "lmstudio" in model.name:
-                return model.name
+        request = ChatRequest(
+            model=actual_name,
+            messages=messages,
+            stream=True,
+            options=options
+        )
         
-        # 最後推薦第一個可用模型
-        return all_models[0].name
+        if service_type == LLMServiceType.OLLAMA:
+            client = self._ollama_client
+        elif service_type == LLMServiceType.LMSTUDIO:
+            client = self._lmstudio_client
+        else:
+            raise MCPLLMError(f"Unsupported service type: {service_type}")
+        
+        async with self._model_semaphore(service_type, actual_name):
+            async with contextlib.aclosing(client.chat_stream(request)) as stream:
+                async for chunk in stream:
+                    yield chunk
     
-    async def health_check(self) -> Dict[str, bool]:
-        """健康檢查所有服務"""
+    async def get_available_services(self) -> Dict[str, bool]:
+        """取得可用服務狀態"""
         if not self._initialized:
             await self.initialize()
         
-        health_status = {}
+        return dict(self._available_services_view)
+    
+    async def get_recommended_model(self) -> Optional[str]:
+        """取得推薦的模型"""
+        if not self._initialized:
+            await self.initialize()
         
-        # 檢查 Ollama
-        if self._ollama_client:
-            try:
-                async with self._ollama_client:
-                    health_status["ollama"] = await self._ollama_client.health_check()
-            except Exception:
-                health_status["ollama"] = False
+        return self._recommended_model
+    
+    async def health_check(self) -> Dict[str, bool]:
+        """健康檢查所有服務"""
+        if not self._initialized:
+            await self.initialize()
         
-        # 檢查 LM Studio
-        if self._lmstudio_client:
-            try:
-                async with self._lmstudio_client:
-                    health_status["lmstudio"] = await self._lmstudio_client.health_check()
-            except Exception:
-                health_status["lmstudio"] = False
+        # 並行呼叫共用同一次探測結果，各自取得副本
+        return dict(await self._single_flight("health", self._probe_health))
+    
+    async def _probe_health(self) -> Dict[str, bool]:
+        """並行探測各服務的健康狀態"""
+        clients = tuple(
+            (service_type, client)
+            for service_type, client in self._service_clients()
+            if client is not None
+        )
+        results = await asyncio.gather(
+            *(client.health_check() for _, client in clients),
+            return_exceptions=True
+        )
+        # 探測拋出的例外一律視為不健康
+        health_status = {
+            service_type.value: (
+                False if isinstance(result, BaseException) else result
+            )
+            for (service_type, _), result in zip(clients, results)
+        }
         
         return health_status
     
     async def cleanup(self) -> None:
         """清理管理器資源"""
         async with self._lock:
+            for client in (self._ollama_client, self._lmstudio_client):
+                if client is not None:
+                    await client.close()
+            # 會話不擁有共用連線池，所有客戶端關閉後再統一關閉
+            if self._connector is not None:
+                await self._connector.close()
+                self._connector = None
             self._service_models.clear()
+            self._model_index = {}
+            self._recommended_model = None
+            self._all_models_cache = None
             self._model_cache.clear()
+            self._inflight.clear()
+            if self._response_cache is not None:
+                self._response_cache.clear()
             self._available_services.clear()
+            self._available_services_view = {}
             self._initialized = False
             logger.info("Unified model manager cleaned up")
\ No newline at end of file
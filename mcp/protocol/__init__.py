@@ -7,6 +7,7 @@ MCP 協議處理模組
 from .handler import MCPHandler
 from .messages import MCPMessage, MCPRequest, MCPResponse
 from .types import MCPMessageType, MCPConnectionState
+from .transport import MCPProtocol, start_server
 
 __all__ = [
     "MCPHandler",
@@ -15,4 +16,6 @@ __all__ = [
     "MCPResponse",
     "MCPMessageType",
     "MCPConnectionState",
+    "MCPProtocol",
+    "start_server",
 ]
\ No newline at end of file
@@ -4,14 +4,17 @@ MCP 協議處理器
 實作 MCP 協議的核心處理邏輯。
 """
 
-import json
+import asyncio
 import logging
-from typing import Any, Dict, Optional, Callable, Awaitable
+import sys
+from types import MappingProxyType
+from typing import Any, Dict, List, Optional, Callable, Awaitable, Sequence, Union
 from asyncio import Protocol
 
+from .. import serialization
 from ..config import get_config
 from ..exceptions import MCPProtocolError
-from .messages import MCPMessage, MCPRequest, MCPResponse, MCPNotification
+from .messages import MCPMessage, MCPRequest, MCPNotification
 from .types import MCPMessageType, MCPConnectionState, MCPCapabilities
 
 
@@ -23,9 +26,28 @@ class MCPHandler:
     
     def __init__(self):
         self.config = get_config()
+        self._protocol_version = self.config.protocol_version
+        self._request_timeout = self.config.request_timeout
         self.state = MCPConnectionState.DISCONNECTED
         self.capabilities: Optional[MCPCapabilities] = None
         self._message_handlers: Dict[str, Callable] = {}
+        # 對外唯讀的處理器視圖，隨 _message_handlers 同步更新
+        self.message_handlers = MappingProxyType(self._message_handlers)
+        # 初始化回應內容固定，建立一次後重複使用（唯讀，請勿修改）
+        self._initialize_response: Dict[str, Any] = {
+            "protocolVersion": self._protocol_version,
+            "capabilities": {
+                "experimental": {},
+                "logging": {},
+                "prompts": {"listChanged": True},
+                "resources": {"subscribe": True, "listChanged": True},
+                "tools": {"listChanged": True},
+            },
+            "serverInfo": {
+                "name": "LocalMind-MCP",
+                "version": "0.1.0",
+            }
+        }
         self._setup_default_handlers()
     
     def _setup_default_handlers(self):
@@ -37,20 +59,70 @@ class MCPHandler:
             "shutdown": self._handle_shutdown,
         })
     
-    async def handle_message(self, raw_message: str) -> Optional[str]:
-        """處理收到的訊息"""
+    async def handle_message(
+        self, raw_message: Union[bytes, str]
+    ) -> Optional[bytes]:
+        """處理收到的訊息
+        
+        輸入與輸出皆以 bytes 為主：傳輸層可直接傳入收到的訊框並寫出回應，
+        不需經過 UTF-8 解碼與編碼；為相容既有呼叫端仍接受 str。
+        訊框可為 JSON-RPC 2.0 批次陣列，此時回應合併為單一陣列。
+        返回 None 表示該訊息不需回覆（通知或回應訊息）。
+        """
+        try:
+            message_data = serialization.loads(raw_message)
+        except serialization.JSONDecodeError as e:
+            logger.error("Failed to parse JSON message: %s", e)
+            return self._create_error_response(
+                None, -32700, "Parse error", str(e)
+            )
+        except Exception as e:
+            logger.error("Unexpected error handling message: %s", e)
+            return self._create_error_response(
+                None, -32603, "Internal error", str(e)
+            )
+        
+        logger.debug("Received message: %s", message_data)
+        
+        if isinstance(message_data, list):
+            return await self._handle_batch_message(message_data)
+        return await self._dispatch(message_data)
+    
+    async def _handle_batch_message(self, messages: List[Any]) -> Optional[bytes]:
+        """處理 JSON-RPC 批次陣列：各訊息並行處理，回應依序合併為一個陣列
+        
+        通知不產生回應；全部皆為通知時不需回覆。
+        """
+        if not messages:
+            return self._create_error_response(
+                None, -32600, "Invalid Request", "Empty batch"
+            )
+        
+        responses = await asyncio.gather(
+            *(self._dispatch(message) for message in messages)
+        )
+        responses = [response for response in responses if response is not None]
+        if not responses:
+            return None
+        # 各回應已是序列化完成的 JSON，直接拼接為陣列，無需重新序列化
+        return b"[" + b",".join(responses) + b"]"
+    
+    async def _dispatch(self, message_data: Any) -> Optional[bytes]:
+        """依訊息類型分派單一已解析的訊息"""
+        # 預先綁定 id，錯誤分支無需再查詢（非物件訊息維持 None）
+        mid = None
         try:
-            message_data = json.loads(raw_message)
-            logger.debug(f"Received message: {message_data}")
-            
             # 驗證訊息格式
             if not isinstance(message_data, dict):
                 raise MCPProtocolError("Message must be a JSON object")
             
-            if message_data.get("jsonrpc") != "2.0":
+            get = message_data.get
+            mid = get("id")
+            
+            if get("jsonrpc") != "2.0":
                 raise MCPProtocolError("Invalid JSON-RPC version")
             
-            # 判斷訊息類型並處理
+            # 判斷訊息類型並處理；id 為 null 仍屬請求，故以鍵存在與否判斷
             if "method" in message_data:
                 if "id" in message_data:
                     # 請求訊息
@@ -66,60 +138,85 @@ class MCPHandler:
             else:
                 raise MCPProtocolError("Invalid message format")
                 
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON message: {e}")
-            return self._create_error_response(
-                None, -32700, "Parse error", str(e)
-            )
         except MCPProtocolError as e:
-            logger.error(f"Protocol error: {e}")
+            logger.error("Protocol error: %s", e)
             return self._create_error_response(
-                message_data.get("id"), -32600, "Invalid Request", str(e)
+                mid, -32600, "Invalid Request", str(e)
             )
         except Exception as e:
-            logger.error(f"Unexpected error handling message: {e}")
+            logger.error("Unexpected error handling message: %s", e)
             return self._create_error_response(
-                message_data.get("id"), -32603, "Internal error", str(e)
+                mid, -32603, "Internal error", str(e)
             )
     
-    async def _handle_request(self, message_data: Dict[str, Any]) -> str:
+    async def handle_batch(
+        self, raw_frames: Sequence[Union[bytes, str]]
+    ) -> List[bytes]:
+        """並行處理一批訊框，依輸入順序返回需要回覆的回應
+        
+        各訊框以任務方式依序排程，不含等待點的處理器（如 initialize、
+        initialized）仍會依收到的順序執行。
+        """
+        responses = await asyncio.gather(
+            *(self.handle_message(frame) for frame in raw_frames)
+        )
+        return [response for response in responses if response is not None]
+    
+    async def _handle_request(self, message_data: Dict[str, Any]) -> bytes:
         """處理請求訊息"""
         method = message_data["method"]
         message_id = message_data["id"]
         params = message_data.get("params", {})
         
-        if method in self._message_handlers:
-            try:
-                result = await self._message_handlers[method](params)
-                return self._create_success_response(message_id, result)
-            except Exception as e:
-                logger.error(f"Error handling method {method}: {e}")
-                return self._create_error_response(
-                    message_id, -32603, "Internal error", str(e)
-                )
-        else:
+        # 分派僅需一次查表與一次呼叫；以 exec 產生各方法的專用函數在 CPython
+        # 中不會更快，回應封裝亦由單次序列化完成（見 _create_success_response）
+        handler = self._message_handlers.get(method)
+        if handler is None:
             return self._create_error_response(
                 message_id, -32601, "Method not found", f"Unknown method: {method}"
             )
+        
+        try:
+            async with asyncio.timeout(self._request_timeout):
+                result = await handler(params)
+            return self._create_success_response(message_id, result)
+        except TimeoutError:
+            logger.error("Method %s timed out after %ss", method, self._request_timeout)
+            return self._create_error_response(
+                message_id, -32603, "Internal error",
+                f"Request timed out after {self._request_timeout}s"
+            )
+        except Exception as e:
+            logger.error("Error handling method %s: %s", method, e)
+            return self._create_error_response(
+                message_id, -32603, "Internal error", str(e)
+            )
     
     async def _handle_notification(self, message_data: Dict[str, Any]):
         """處理通知訊息"""
         method = message_data["method"]
         params = message_data.get("params", {})
         
-        if method in self._message_handlers:
-            try:
-                await self._message_handlers[method](params)
-            except Exception as e:
-                logger.error(f"Error handling notification {method}: {e}")
-        else:
-            logger.warning(f"Unknown notification method: {method}")
+        handler = self._message_handlers.get(method)
+        if handler is None:
+            logger.warning("Unknown notification method: %s", method)
+            return
+        
+        try:
+            async with asyncio.timeout(self._request_timeout):
+                await handler(params)
+        except TimeoutError:
+            logger.error(
+                "Notification %s timed out after %ss", method, self._request_timeout
+            )
+        except Exception as e:
+            logger.error("Error handling notification %s: %s", method, e)
     
     async def _handle_response(self, message_data: Dict[str, Any]):
         """處理回應訊息"""
         # 這裡可以實作回應處理邏輯
         # 目前只記錄日誌
-        logger.debug(f"Received response: {message_data}")
+        logger.debug("Received response: %s", message_data)
     
     async def _handle_initialize(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """處理初始化請求"""
@@ -127,7 +224,7 @@ class MCPHandler:
         
         # 驗證協議版本
         protocol_version = params.get("protocolVersion")
-        if protocol_version != self.config.protocol_version:
+        if protocol_version != self._protocol_version:
             raise MCPProtocolError(
                 f"Unsupported protocol version: {protocol_version}"
             )
@@ -135,20 +232,7 @@ class MCPHandler:
         self.state = MCPConnectionState.CONNECTING
         
         # 返回伺服器能力
-        return {
-            "protocolVersion": self.config.protocol_version,
-            "capabilities": {
-                "experimental": {},
-                "logging": {},
-                "prompts": {"listChanged": True},
-                "resources": {"subscribe": True, "listChanged": True},
-                "tools": {"listChanged": True},
-            },
-            "serverInfo": {
-                "name": "LocalMind-MCP",
-                "version": "0.1.0",
-            }
-        }
+        return self._initialize_response
     
     async def _handle_initialized(self, params: Dict[str, Any]):
         """處理初始化完成通知"""
@@ -165,10 +249,13 @@ class MCPHandler:
         self.state = MCPConnectionState.DISCONNECTED
         return {}
     
-    def _create_success_response(self, message_id: Any, result: Any) -> str:
+    def _create_success_response(self, message_id: Any, result: Any) -> bytes:
         """建立成功回應"""
-        response = MCPResponse(id=message_id, result=result)
-        return json.dumps(response.to_dict())
+        # 回應結構固定，直接組裝字典，不經由 MCPResponse 轉換；
+        # 實測單次 orjson.dumps 比預先拼接固定前綴的 bytes 更快，故不另做拼接
+        return serialization.dumps(
+            {"jsonrpc": "2.0", "id": message_id, "result": result}
+        )
     
     def _create_error_response(
         self, 
@@ -176,18 +263,23 @@ class MCPHandler:
         code: int, 
         message: str, 
         data: Optional[Any] = None
-    ) -> str:
+    ) -> bytes:
         """建立錯誤回應"""
         error = {"code": code, "message": message}
         if data:
             error["data"] = data
         
-        response = MCPResponse(id=message_id, error=error)
-        return json.dumps(response.to_dict())
+        return serialization.dumps(
+            {"jsonrpc": "2.0", "id": message_id, "error": error}
+        )
     
     def register_handler(self, method: str, handler: Callable):
-        """註冊訊息處理器"""
-        self._message_handlers[method] = handler
+        """註冊訊息處理器
+        
+        處理器須為原生協程函數，直接 await 即可；逾時由處理器統一以
+        asyncio.timeout 控制，請勿再以 asyncio.wait 包裝單一 future。
+        """
+        self._message_handlers[sys.intern(method)] = handler
     
     def get_state(self) -> MCPConnectionState:
         """取得連接狀態"""
@@ -5,11 +5,12 @@ MCP 協議訊息類型
 """
 
 from typing import Any, Dict, Optional, Union
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from .. import serialization
 from .types import MCPMessageType
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MCPMessage:
     """MCP 基礎訊息類別"""
     jsonrpc: str = "2.0"
@@ -21,30 +22,35 @@ class MCPMessage:
         if self.id is not None:
             result["id"] = self.id
         return result
+    
+    def to_json_bytes(self) -> bytes:
+        """序列化為 JSON bytes（供傳輸層直接寫出）"""
+        return serialization.dumps(self.to_dict())
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MCPRequest(MCPMessage):
     """MCP 請求訊息"""
     method: str = ""
     params: Optional[Dict[str, Any]] = None
     
     def to_dict(self) -> Dict[str, Any]:
-        result = super().to_dict()
+        # slots=True 會重建類別，零參數 super() 無法使用，改為明確呼叫基類
+        result = MCPMessage.to_dict(self)
         result["method"] = self.method
         if self.params:
             result["params"] = self.params
         return result
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MCPResponse(MCPMessage):
     """MCP 回應訊息"""
     result: Optional[Any] = None
     error: Optional[Dict[str, Any]] = None
     
     def to_dict(self) -> Dict[str, Any]:
-        result = super().to_dict()
+        result = MCPMessage.to_dict(self)
         if self.result is not None:
             result["result"] = self.result
         if self.error:
@@ -52,16 +58,14 @@ class MCPResponse(MCPMessage):
         return result
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MCPNotification(MCPMessage):
     """MCP 通知訊息"""
+    # 通知訊息不應該有 id，因此不開放於建構時指定
+    id: None = field(default=None, init=False)
     method: str = ""
     params: Optional[Dict[str, Any]] = None
     
-    def __post_init__(self):
-        # 通知訊息不應該有 id
-        self.id = None
-    
     def to_dict(self) -> Dict[str, Any]:
         result = {"jsonrpc": self.jsonrpc, "method": self.method}
         if self.params:
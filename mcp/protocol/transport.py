@@ -0,0 +1,141 @@
+"""
+MCP 協議傳輸層
+
+以 asyncio.Protocol 實作換行分隔的 JSON-RPC 傳輸，
+避免 StreamReader/StreamWriter 在小訊框上的排程開銷。
+"""
+
+import asyncio
+import logging
+from typing import Callable, List, Optional
+
+from .. import serialization
+from .handler import MCPHandler
+
+
+logger = logging.getLogger(__name__)
+
+
+def _split_frames(buffer: bytearray) -> List[bytes]:
+    """從緩衝區取出所有完整訊框，未完成的部分留在緩衝區
+    
+    以一次 rfind 找到最後一個分隔符，再由 C 層級的 split 一次切割，
+    避免逐訊框掃描與重複搬移緩衝區。
+    """
+    end = buffer.rfind(b"\n")
+    if end < 0:
+        return []
+    
+    complete = bytes(buffer[:end])
+    del buffer[:end + 1]
+    return [frame for frame in complete.split(b"\n") if frame.strip()]
+
+
+class MCPProtocol(asyncio.Protocol):
+    """換行分隔的 MCP 傳輸協議
+    
+    data_received 只負責切割訊框並放入佇列，由單一背景任務批次處理，
+    同一連接的回應依收到的順序合併為一次寫入。
+    """
+    
+    # 佇列中待處理的批次超過此數量時暫停讀取
+    max_pending_batches: int = 64
+    # 佇列中待處理訊框的總位元組數超過此值時暫停讀取
+    max_pending_bytes: int = 1024 * 1024
+    # 尚未收到換行的部分訊框上限；超過時回覆 -32600 並關閉連接
+    max_frame_size: int = 1024 * 1024
+    
+    def __init__(self, handler: MCPHandler):
+        self.handler = handler
+        self.transport: Optional[asyncio.Transport] = None
+        self._buffer = bytearray()
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._paused = False
+        self._pending_bytes = 0
+    
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        """建立連接時啟動處理任務"""
+        self.transport = transport
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.get_running_loop().create_task(self._process())
+    
+    def data_received(self, data: bytes) -> None:
+        """接收資料並切割出完整訊框"""
+        self._buffer += data
+        frames = _split_frames(self._buffer)
+        if frames:
+            self._queue.put_nowait(frames)
+            self._pending_bytes += sum(len(frame) for frame in frames)
+            if not self._paused and (
+                self._queue.qsize() > self.max_pending_batches
+                or self._pending_bytes > self.max_pending_bytes
+            ):
+                self._paused = True
+                self.transport.pause_reading()
+        
+        if len(self._buffer) > self.max_frame_size:
+            self._reject_oversized_frame()
+    
+    def _reject_oversized_frame(self) -> None:
+        """對方送出過大的訊框（或從未送出換行）時回覆錯誤並關閉連接"""
+        logger.warning(
+            "MCP frame exceeds %d bytes without a newline; closing connection",
+            self.max_frame_size
+        )
+        self._buffer.clear()
+        self.transport.write(serialization.dumps({
+            "jsonrpc": "2.0",
+            "id": None,
+            "error": {
+                "code": -32600,
+                "message": "Invalid Request",
+                "data": f"Frame exceeds {self.max_frame_size} bytes",
+            },
+        }) + b"\n")
+        self.transport.close()
+    
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        """連接關閉時停止處理任務"""
+        if exc is not None:
+            logger.warning("MCP connection lost: %s", exc)
+        self._buffer.clear()
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+    
+    async def _process(self) -> None:
+        """依序處理佇列中的訊框並批次寫回回應"""
+        while True:
+            frames = await self._queue.get()
+            # 合併佇列中已就緒的訊框，一次處理並寫回
+            while not self._queue.empty():
+                frames.extend(self._queue.get_nowait())
+            
+            self._pending_bytes -= sum(len(frame) for frame in frames)
+            if self._paused:
+                self._paused = False
+                self.transport.resume_reading()
+            
+            try:
+                responses = await self.handler.handle_batch(frames)
+            except Exception as e:
+                logger.error("Failed to handle MCP frames: %s", e)
+                continue
+            
+            if responses and not self.transport.is_closing():
+                self.transport.write(b"\n".join(responses) + b"\n")
+
+
+async def start_server(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    handler_factory: Callable[[], MCPHandler] = MCPHandler,
+) -> asyncio.AbstractServer:
+    """啟動 MCP TCP 伺服器（每個連接使用獨立的處理器）"""
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(
+        lambda: MCPProtocol(handler_factory()), host, port
+    )
+    logger.info("MCP server listening on %s:%s", host, port)
+    return server
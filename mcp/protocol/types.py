@@ -25,7 +25,7 @@ class MCPConnectionState(Enum):
     ERROR = "error"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MCPCapabilities:
     """MCP 能力描述"""
     experimental: Dict[str, Any]
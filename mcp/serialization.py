@@ -0,0 +1,57 @@
+"""
+MCP JSON 序列化工具
+
+優先使用 orjson（C 實作，直接輸出 bytes 並原生支援 dataclass），
+未安裝時退回標準函式庫 json，確保模組在缺少依賴時仍可運作。
+
+解析刻意只使用單一加速後端：MCP 訊框通常僅數百位元組，orjson 的解析
+速度已與 simdjson 相當，而 simdjson 的延遲解析代理物件需在交給處理器前
+再轉為 dict，反而抵銷其優勢。
+"""
+
+import dataclasses
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 依賴缺失時的退路
+    orjson = None
+
+
+HAS_ORJSON = orjson is not None
+
+# 統一的解析錯誤類型（orjson.JSONDecodeError 亦為 json.JSONDecodeError 子類）
+JSONDecodeError = json.JSONDecodeError
+
+
+def _default(obj: Any) -> Any:
+    """標準 json 無法處理的物件轉換（與 orjson 的 dataclass 行為一致）"""
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """序列化為 UTF-8 編碼的 JSON bytes"""
+    if HAS_ORJSON:
+        return orjson.dumps(obj)
+    return json.dumps(
+        obj, default=_default, ensure_ascii=False, separators=(",", ":")
+    ).encode()
+
+
+def dumps_indented(obj: Any) -> bytes:
+    """序列化為縮排兩格的 JSON bytes（供日誌與報告顯示）"""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(
+        obj, default=_default, ensure_ascii=False, indent=2
+    ).encode()
+
+
+def loads(data: Union[bytes, bytearray, str]) -> Any:
+    """解析 JSON（接受 bytes 或 str）"""
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
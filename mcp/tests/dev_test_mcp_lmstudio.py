@@ -5,7 +5,6 @@ MCP-LMStudio 開發環境測試
 針對本地開發環境優化的測試腳本，使用適合 DeepSeek R1 模型的超時設定
 """
 
-import asyncio
 import sys
 import os
 from pathlib import Path
@@ -30,6 +29,7 @@ load_dev_env()
 
 from mcp.llm.unified_manager import UnifiedModelManager, LLMServiceType
 from mcp.llm.types import ChatMessage
+from mcp.tests.manual_loop import run_main
 
 
 async def dev_test():
@@ -121,7 +121,7 @@ async def dev_test():
 
 if __name__ == "__main__":
     print("🚀 啟動開發環境測試...")
-    success = asyncio.run(dev_test())
+    success = run_main(dev_test())
     
     if success:
         print("\n✅ 開發環境配置完成，可以開始使用 MCP 系統！")
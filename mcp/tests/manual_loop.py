@@ -0,0 +1,21 @@
+"""
+手動測試腳本的事件迴圈
+
+已安裝 uvloop 時以其事件迴圈執行測試入口（uvloop 不支援 Windows），
+未安裝時使用標準的 asyncio 事件迴圈，測試程式碼本身不需修改。
+"""
+
+import asyncio
+from typing import Any, Coroutine
+
+try:
+    import uvloop
+except ImportError:  # pragma: no cover - 依賴缺失時的退路
+    uvloop = None
+
+
+def run_main(main: Coroutine[Any, Any, Any]) -> Any:
+    """執行測試入口協程並返回其結果"""
+    loop_factory = uvloop.new_event_loop if uvloop is not None else None
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        return runner.run(main)
@@ -0,0 +1,99 @@
+"""
+手動測試腳本的輸出緩衝工具
+
+各測試套件的輸出先寫入獨立的緩衝區，結束後依原順序一次寫出；
+容器內設定 PYTHONUNBUFFERED，逐行 print 會各自觸發一次寫入。
+"""
+
+import asyncio
+import io
+import sys
+from contextlib import redirect_stdout
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, List, Optional, Sequence, Tuple
+
+
+_output_buffer: ContextVar[Optional[io.StringIO]] = ContextVar(
+    "_output_buffer", default=None
+)
+
+
+class _TaskOutput(io.TextIOBase):
+    """依目前任務的 context 將輸出導向各自的緩衝區
+    
+    redirect_stdout 會替換整個行程的 sys.stdout，無法在並行任務間各自緩衝；
+    改以 ContextVar 記錄各任務的緩衝區，未設定時直接寫到原本的 stdout。
+    """
+    
+    def __init__(self, target):
+        self._target = target
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, text: str) -> int:
+        return (_output_buffer.get() or self._target).write(text)
+    
+    def flush(self) -> None:
+        self._target.flush()
+
+
+def run_sync_test(test_name: str, test_func: Callable[[], bool]) -> Tuple[bool, str]:
+    """在獨立的輸出緩衝區中執行同步測試，返回結果與輸出內容"""
+    passed = False
+    with redirect_stdout(io.StringIO()) as buffer:
+        print(f"\n📋 執行測試: {test_name}")
+        try:
+            if test_func():
+                passed = True
+                print(f"✅ {test_name} 測試通過")
+            else:
+                print(f"❌ {test_name} 測試失敗")
+        except Exception as e:
+            print(f"❌ {test_name} 測試異常: {e}")
+    return passed, buffer.getvalue()
+
+
+async def _buffered(awaitable: Awaitable[Any]) -> Tuple[Any, str]:
+    """在獨立的輸出緩衝區中等待 awaitable，返回結果與輸出內容"""
+    buffer = io.StringIO()
+    # gather 會為每個任務複製 context，此設定只影響目前的任務
+    _output_buffer.set(buffer)
+    return await awaitable, buffer.getvalue()
+
+
+async def gather_buffered(*awaitables: Awaitable[Any]) -> List[Tuple[Any, str]]:
+    """並行等待多個 awaitable，依輸入順序返回 (結果, 輸出內容)
+    
+    各任務的 print 輸出分別緩衝，由呼叫端依序寫出，避免並行輸出交錯。
+    """
+    stdout = sys.stdout
+    sys.stdout = _TaskOutput(stdout)
+    try:
+        return await asyncio.gather(*(_buffered(aw) for aw in awaitables))
+    finally:
+        sys.stdout = stdout
+
+
+async def _run_async_test(
+    test_name: str, test_func: Callable[[], Awaitable[bool]]
+) -> bool:
+    """執行異步測試並輸出結果"""
+    print(f"\n📋 執行測試: {test_name}")
+    try:
+        if await test_func():
+            print(f"✅ {test_name} 測試通過")
+            return True
+        print(f"❌ {test_name} 測試失敗")
+    except Exception as e:
+        print(f"❌ {test_name} 測試異常: {e}")
+    return False
+
+
+async def run_async_tests(
+    tests: Sequence[Tuple[str, Callable[[], Awaitable[bool]]]]
+) -> List[Tuple[bool, str]]:
+    """並行執行彼此獨立的異步測試，依輸入順序返回 (結果, 輸出內容)"""
+    return await gather_buffered(
+        *(_run_async_test(name, func) for name, func in tests)
+    )
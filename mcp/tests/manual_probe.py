@@ -0,0 +1,27 @@
+"""
+手動測試腳本的服務連線探測
+
+在匯入 LLM 相關模組（aiohttp 等）之前，先以 TCP 連線確認服務埠可達；
+服務未啟動時可立即結束，不必載入整個 LLM 堆疊或等待 HTTP 逾時。
+"""
+
+import asyncio
+
+
+async def service_reachable(host: str, port: int, timeout: float = 0.5) -> bool:
+    """檢查指定主機與埠是否可建立 TCP 連線"""
+    writer = None
+    try:
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port), timeout=timeout
+        )
+        return True
+    except (OSError, asyncio.TimeoutError):
+        return False
+    finally:
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
@@ -6,12 +6,30 @@ MCP 配置管理手動測試腳本
 docker compose exec django python mcp/tests/manual_test_config.py
 """
 
+import io
 import os
 import sys
+from contextlib import contextmanager, redirect_stdout
+from typing import Dict, Iterator
 from mcp.config import MCPConfig, get_config, set_config
 from mcp.exceptions import MCPConfigurationError
 
 
+@contextmanager
+def patched_env(mapping: Dict[str, str]) -> Iterator[None]:
+    """暫時套用環境變數，結束時還原（原本不存在的鍵會被移除）"""
+    backup = {key: os.environ.get(key) for key in mapping}
+    os.environ.update(mapping)
+    try:
+        yield
+    finally:
+        for key, value in backup.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
 def test_default_config():
     """測試預設配置"""
     print("=== 測試預設配置 ===")
@@ -54,17 +72,7 @@ def test_env_config():
         "MCP_CACHE_TTL": "7200",
     }
     
-    # 備份現有環境變數
-    backup_env = {}
-    for key in test_env:
-        if key in os.environ:
-            backup_env[key] = os.environ[key]
-    
-    try:
-        # 設置測試環境變數
-        for key, value in test_env.items():
-            os.environ[key] = value
-        
+    with patched_env(test_env):
         # 從環境變數載入配置
         env_config = MCPConfig.from_env()
         
@@ -96,14 +104,6 @@ def test_env_config():
             print(f"❌ 環境變數配置驗證失敗: {e}")
         
         return True
-        
-    finally:
-        # 恢復環境變數
-        for key in test_env:
-            if key in backup_env:
-                os.environ[key] = backup_env[key]
-            else:
-                os.environ.pop(key, None)
 
 
 def test_invalid_config():
@@ -153,22 +153,13 @@ def test_invalid_config():
     # 測試無效的環境變數值
     print("\n5. 測試無效的環境變數值...")
     
-    # 備份環境變數
-    backup_max_conn = os.environ.get("MCP_MAX_CONNECTIONS")
-    
-    try:
-        os.environ["MCP_MAX_CONNECTIONS"] = "invalid_number"
-        MCPConfig.from_env()
-        print("❌ 應該拋出配置錯誤")
-        return False
-    except MCPConfigurationError as e:
-        print(f"✅ 正確捕獲環境變數錯誤: {e}")
-    finally:
-        # 恢復環境變數
-        if backup_max_conn:
-            os.environ["MCP_MAX_CONNECTIONS"] = backup_max_conn
-        else:
-            os.environ.pop("MCP_MAX_CONNECTIONS", None)
+    with patched_env({"MCP_MAX_CONNECTIONS": "invalid_number"}):
+        try:
+            MCPConfig.from_env()
+            print("❌ 應該拋出配置錯誤")
+            return False
+        except MCPConfigurationError as e:
+            print(f"✅ 正確捕獲環境變數錯誤: {e}")
     
     return True
 
@@ -284,15 +275,19 @@ def main():
     total = len(tests)
     
     for test_name, test_func in tests:
-        print(f"\n📋 執行測試: {test_name}")
-        try:
-            if test_func():
-                passed += 1
-                print(f"✅ {test_name} 測試通過")
-            else:
-                print(f"❌ {test_name} 測試失敗")
-        except Exception as e:
-            print(f"❌ {test_name} 測試異常: {e}")
+        # 每個測試的輸出先寫入緩衝區，結束後一次寫出
+        # （容器內設定 PYTHONUNBUFFERED，逐行 print 會各自觸發一次寫入）
+        with redirect_stdout(io.StringIO()) as output:
+            print(f"\n📋 執行測試: {test_name}")
+            try:
+                if test_func():
+                    passed += 1
+                    print(f"✅ {test_name} 測試通過")
+                else:
+                    print(f"❌ {test_name} 測試失敗")
+            except Exception as e:
+                print(f"❌ {test_name} 測試異常: {e}")
+        sys.stdout.write(output.getvalue())
     
     print("\n" + "=" * 50)
     print(f"🏁 測試完成: {passed}/{total} 通過")
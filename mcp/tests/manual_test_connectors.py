@@ -8,18 +8,43 @@ docker compose exec django python mcp/tests/manual_test_connectors.py
 
 import asyncio
 import sys
-from typing import Dict, Any
+from types import MappingProxyType
+from typing import Any, Dict, Mapping
 from mcp.connectors.base import (
     BaseConnector, ConnectorConfig, ConnectorType, 
     ResourceInfo, ToolInfo
 )
 from mcp.connectors.registry import registry
 from mcp.exceptions import MCPConnectorError
+from mcp.tests.manual_output import run_async_tests, run_sync_test
+from mcp.tests.manual_loop import run_main
 
 
 class TestFileSystemConnector(BaseConnector):
     """測試用檔案系統連接器"""
     
+    # 模擬檔案內容；回應為共用的唯讀資料，呼叫端不應修改
+    _RESPONSES: Mapping[str, Dict[str, Any]] = MappingProxyType({
+        "file:///tmp/test.txt": {
+            "uri": "file:///tmp/test.txt",
+            "contents": [
+                {
+                    "type": "text",
+                    "text": "這是一個測試文字檔案的內容。"
+                }
+            ]
+        },
+        "file:///tmp/config.json": {
+            "uri": "file:///tmp/config.json",
+            "contents": [
+                {
+                    "type": "text",
+                    "text": '{"name": "test-config", "version": "1.0"}'
+                }
+            ]
+        },
+    })
+    
     async def initialize(self):
         print(f"   初始化檔案系統連接器: {self.name}")
         
@@ -64,6 +89,12 @@ class TestFileSystemConnector(BaseConnector):
             }
         ))
         
+        # 建立工具名稱的分派表，取代逐一比對的 if/elif
+        self._tool_handlers = {
+            "read_file": self._read_file,
+            "write_file": self._write_file,
+        }
+        
         self._initialized = True
     
     async def cleanup(self):
@@ -79,29 +110,10 @@ class TestFileSystemConnector(BaseConnector):
         
         print(f"   讀取資源: {uri}")
         
-        # 模擬檔案讀取
-        if uri == "file:///tmp/test.txt":
-            return {
-                "uri": uri,
-                "contents": [
-                    {
-                        "type": "text",
-                        "text": "這是一個測試文字檔案的內容。"
-                    }
-                ]
-            }
-        elif uri == "file:///tmp/config.json":
-            return {
-                "uri": uri,
-                "contents": [
-                    {
-                        "type": "text",
-                        "text": '{"name": "test-config", "version": "1.0"}'
-                    }
-                ]
-            }
-        else:
+        response = self._RESPONSES.get(uri)
+        if response is None:
             raise MCPConnectorError(f"Resource not found: {uri}")
+        return response
     
     async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
         if not self._initialized:
@@ -109,27 +121,44 @@ class TestFileSystemConnector(BaseConnector):
         
         print(f"   呼叫工具: {name} with {arguments}")
         
-        if name == "read_file":
-            path = arguments.get("path")
-            return {
-                "content": f"模擬讀取檔案 {path} 的內容",
-                "success": True
-            }
-        elif name == "write_file":
-            path = arguments.get("path")
-            content = arguments.get("content")
-            return {
-                "message": f"成功寫入內容到 {path}",
-                "bytes_written": len(content),
-                "success": True
-            }
-        else:
+        handler = self._tool_handlers.get(name)
+        if handler is None:
             raise MCPConnectorError(f"Unknown tool: {name}")
+        self._validate_tool_arguments(name, arguments)
+        return await handler(arguments)
+    
+    async def _read_file(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        path = arguments.get("path")
+        return {
+            "content": f"模擬讀取檔案 {path} 的內容",
+            "success": True
+        }
+    
+    async def _write_file(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        path = arguments.get("path")
+        content = arguments.get("content")
+        return {
+            "message": f"成功寫入內容到 {path}",
+            "bytes_written": len(content),
+            "success": True
+        }
 
 
 class TestDatabaseConnector(BaseConnector):
     """測試用資料庫連接器"""
     
+    _RESPONSES: Mapping[str, Dict[str, Any]] = MappingProxyType({
+        "db://localhost/users": {
+            "uri": "db://localhost/users",
+            "contents": [
+                {
+                    "type": "text",
+                    "text": '{"users": [{"id": 1, "name": "Alice"}, {"id": 2, "name": "Bob"}]}'
+                }
+            ]
+        },
+    })
+    
     async def initialize(self):
         print(f"   初始化資料庫連接器: {self.name}")
         
@@ -154,6 +183,10 @@ class TestDatabaseConnector(BaseConnector):
             }
         ))
         
+        self._tool_handlers = {
+            "query": self._query,
+        }
+        
         self._initialized = True
     
     async def cleanup(self):
@@ -164,29 +197,25 @@ class TestDatabaseConnector(BaseConnector):
         return self._initialized
     
     async def read_resource(self, uri: str) -> Dict[str, Any]:
-        if uri == "db://localhost/users":
-            return {
-                "uri": uri,
-                "contents": [
-                    {
-                        "type": "text",
-                        "text": '{"users": [{"id": 1, "name": "Alice"}, {"id": 2, "name": "Bob"}]}'
-                    }
-                ]
-            }
-        else:
+        response = self._RESPONSES.get(uri)
+        if response is None:
             raise MCPConnectorError(f"Resource not found: {uri}")
+        return response
     
     async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
-        if name == "query":
-            sql = arguments.get("sql")
-            return {
-                "result": f"模擬執行 SQL: {sql}",
-                "rows_affected": 2,
-                "success": True
-            }
-        else:
+        handler = self._tool_handlers.get(name)
+        if handler is None:
             raise MCPConnectorError(f"Unknown tool: {name}")
+        self._validate_tool_arguments(name, arguments)
+        return await handler(arguments)
+    
+    async def _query(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        sql = arguments.get("sql")
+        return {
+            "result": f"模擬執行 SQL: {sql}",
+            "rows_affected": 2,
+            "success": True
+        }
 
 
 def test_connector_config():
@@ -409,8 +438,8 @@ async def test_registry():
     registry.register_connector(ConnectorType.FILESYSTEM, TestFileSystemConnector)
     registry.register_connector(ConnectorType.DATABASE, TestDatabaseConnector)
     
-    registered_types = registry.list_registered_types()
-    print(f"   已註冊類型: {[t.value for t in registered_types]}")
+    registered_types = registry.list_registered_type_values()
+    print(f"   已註冊類型: {list(registered_types)}")
     
     if len(registered_types) >= 2:
         print("   ✅ 連接器註冊成功")
@@ -489,7 +518,7 @@ async def test_registry():
     health_results = await registry.health_check_all()
     print(f"   健康檢查結果: {health_results}")
     
-    healthy_count = sum(1 for healthy in health_results.values() if healthy)
+    healthy_count = sum(map(bool, health_results.values()))
     if healthy_count == len(health_results):
         print("   ✅ 所有連接器健康")
     else:
@@ -503,18 +532,18 @@ async def test_registry():
     return True
 
 
-async def test_error_scenarios():
-    """測試錯誤場景"""
-    print("\n=== 測試錯誤場景 ===")
-    
-    config = ConnectorConfig(
+def _error_test_connector() -> TestFileSystemConnector:
+    """建立錯誤場景使用的連接器"""
+    return TestFileSystemConnector(ConnectorConfig(
         name="error-test",
         type=ConnectorType.FILESYSTEM
-    )
-    
-    connector = TestFileSystemConnector(config)
+    ))
+
+
+async def _test_uninitialized_errors() -> bool:
+    """測試未初始化使用（使用未初始化的連接器）"""
+    connector = _error_test_connector()
     
-    # 1. 測試未初始化使用
     print("1. 測試未初始化使用...")
     
     # 嘗試在未初始化時讀取資源
@@ -533,30 +562,64 @@ async def test_error_scenarios():
     except MCPConnectorError as e:
         print(f"   ✅ 正確捕獲未初始化錯誤: {e}")
     
-    # 2. 測試資源不存在
-    print("\n2. 測試資源不存在...")
-    
+    return True
+
+
+async def _test_not_found_errors() -> bool:
+    """測試資源／工具不存在與無效參數（共用一個已初始化的連接器）"""
+    connector = _error_test_connector()
     await connector.initialize()
     
     try:
-        await connector.read_resource("file:///nonexistent/file.txt")
-        print("   ❌ 應該拋出資源不存在錯誤")
-        return False
-    except MCPConnectorError as e:
-        print(f"   ✅ 正確捕獲資源不存在錯誤: {e}")
-    
-    # 3. 測試工具不存在
-    print("\n3. 測試工具不存在...")
-    
-    try:
-        await connector.call_tool("nonexistent_tool", {})
-        print("   ❌ 應該拋出工具不存在錯誤")
-        return False
-    except MCPConnectorError as e:
-        print(f"   ✅ 正確捕獲工具不存在錯誤: {e}")
+        # 2. 測試資源不存在
+        print("\n2. 測試資源不存在...")
+        
+        try:
+            await connector.read_resource("file:///nonexistent/file.txt")
+            print("   ❌ 應該拋出資源不存在錯誤")
+            return False
+        except MCPConnectorError as e:
+            print(f"   ✅ 正確捕獲資源不存在錯誤: {e}")
+        
+        # 3. 測試工具不存在
+        print("\n3. 測試工具不存在...")
+        
+        try:
+            await connector.call_tool("nonexistent_tool", {})
+            print("   ❌ 應該拋出工具不存在錯誤")
+            return False
+        except MCPConnectorError as e:
+            print(f"   ✅ 正確捕獲工具不存在錯誤: {e}")
+        
+        # 4. 測試工具參數不符合 input_schema
+        print("\n4. 測試無效的工具參數...")
+        
+        try:
+            await connector.call_tool("write_file", {"path": "/tmp/test.txt"})
+            print("   ❌ 應該拋出參數驗證錯誤")
+            return False
+        except MCPConnectorError as e:
+            if "Invalid arguments for tool 'write_file'" not in str(e):
+                print(f"   ❌ 錯誤並非來自參數驗證: {e}")
+                return False
+            print(f"   ✅ 正確捕獲參數驗證錯誤: {e}")
+        
+        return True
+    finally:
+        await connector.cleanup()
+
+
+async def test_error_scenarios():
+    """測試錯誤場景"""
+    print("\n=== 測試錯誤場景 ===")
     
-    await connector.cleanup()
-    return True
+    # 兩部分使用各自的連接器，彼此獨立；測試連接器不含等待點，
+    # 輸出仍依排程順序（先未初始化、後不存在）呈現
+    results = await asyncio.gather(
+        _test_uninitialized_errors(),
+        _test_not_found_errors(),
+    )
+    return all(results)
 
 
 async def main():
@@ -564,32 +627,35 @@ async def main():
     print("🚀 開始 MCP 連接器系統手動測試")
     print("=" * 50)
     
+    # (名稱, 函數, 是否為異步)：測試清單固定，直接標註而不在執行時檢查
     tests = [
-        ("連接器配置", test_connector_config),
-        ("連接器生命週期", test_connector_lifecycle),
-        ("資源和工具功能", test_resources_and_tools),
-        ("註冊表功能", test_registry),
-        ("錯誤場景", test_error_scenarios),
+        ("連接器配置", test_connector_config, False),
+        ("連接器生命週期", test_connector_lifecycle, True),
+        ("資源和工具功能", test_resources_and_tools, True),
+        ("註冊表功能", test_registry, True),
+        ("錯誤場景", test_error_scenarios, True),
     ]
     
     passed = 0
     total = len(tests)
     
-    for test_name, test_func in tests:
-        print(f"\n📋 執行測試: {test_name}")
-        try:
-            if asyncio.iscoroutinefunction(test_func):
-                result = await test_func()
-            else:
-                result = test_func()
-            
-            if result:
-                passed += 1
-                print(f"✅ {test_name} 測試通過")
-            else:
-                print(f"❌ {test_name} 測試失敗")
-        except Exception as e:
-            print(f"❌ {test_name} 測試異常: {e}")
+    # 同步測試先依序執行；每個測試的輸出皆於結束後一次寫出
+    # （容器內設定 PYTHONUNBUFFERED，逐行 print 會各自觸發一次寫入）
+    async_tests = []
+    for test_name, test_func, is_async in tests:
+        if is_async:
+            async_tests.append((test_name, test_func))
+            continue
+        ok, output = run_sync_test(test_name, test_func)
+        sys.stdout.write(output)
+        if ok:
+            passed += 1
+    
+    # 異步測試彼此獨立，並行執行後依原順序輸出各自的內容
+    for ok, output in await run_async_tests(async_tests):
+        sys.stdout.write(output)
+        if ok:
+            passed += 1
     
     print("\n" + "=" * 50)
     print(f"🏁 測試完成: {passed}/{total} 通過")
@@ -604,7 +670,7 @@ async def main():
 
 if __name__ == "__main__":
     try:
-        success = asyncio.run(main())
+        success = run_main(main())
         sys.exit(0 if success else 1)
     except KeyboardInterrupt:
         print("\n⚠️  測試被用戶中斷")
@@ -16,9 +16,11 @@ docker compose exec django python -m mcp.tests.manual_test_lmstudio
 
 import asyncio
 import sys
+from contextlib import aclosing
 from mcp.llm.lmstudio_client import LMStudioClient
 from mcp.llm.unified_manager import UnifiedModelManager, LLMServiceType
 from mcp.llm.types import ChatMessage
+from mcp.tests.manual_loop import run_main
 
 
 async def test_lmstudio_client():
@@ -26,6 +28,29 @@ async def test_lmstudio_client():
     print("=== LM Studio 客戶端測試 ===")
     
     client = LMStudioClient()
+    try:
+        async with client:
+            return await _run_lmstudio_client_phases(client)
+    finally:
+        await client.close()
+
+
+async def _read_stream_prefix(
+    client: LMStudioClient, request, limit: int
+) -> str:
+    """串流讀取回應，取得 limit 個字元後即停止（不等待完整生成）"""
+    text = ""
+    async with aclosing(client.chat_stream(request)) as stream:
+        async for chunk in stream:
+            text += chunk
+            if len(text) >= limit:
+                break
+    return text
+
+
+async def _run_lmstudio_client_phases(client: LMStudioClient) -> bool:
+    """依序執行各測試階段（共用同一會話與模型列表）"""
+    from mcp.llm.types import ChatRequest
     
     # 1. 測試健康檢查
     print("1. 測試 LM Studio 服務健康檢查...")
@@ -48,97 +73,77 @@ async def test_lmstudio_client():
     # 2. 測試模型列表
     print("\n2. 測試模型列表...")
     try:
-        async with client:
-            models = await client.list_models()
-            print(f"   找到 {len(models)} 個模型:")
+        models = await client.list_models()
+        print(f"   找到 {len(models)} 個模型:")
+        
+        deepseek_found = False
+        for i, model in enumerate(models):
+            print(f"     {i+1}. {model.name}")
+            if model.details:
+                print(f"        擁有者: {model.details.get('owned_by', 'unknown')}")
+                print(f"        物件類型: {model.details.get('object', 'unknown')}")
             
-            deepseek_found = False
-            for i, model in enumerate(models):
-                print(f"     {i+1}. {model.name}")
-                if model.details:
-                    print(f"        擁有者: {model.details.get('owned_by', 'unknown')}")
-                    print(f"        物件類型: {model.details.get('object', 'unknown')}")
-                
-                # 檢查是否有 DeepSeek 模型
-                if "deepseek" in model.name.lower():
-                    deepseek_found = True
-                    print(f"        🎯 發現 DeepSeek 模型！")
+            # 檢查是否有 DeepSeek 模型
+            if "deepseek" in model.name.lower():
+                deepseek_found = True
+                print(f"        🎯 發現 DeepSeek 模型！")
+        
+        if deepseek_found:
+            print("   ✅ 找到 DeepSeek 模型")
+        else:
+            print("   ⚠️  未找到 DeepSeek 模型，但有其他可用模型")
             
-            if deepseek_found:
-                print("   ✅ 找到 DeepSeek 模型")
-            else:
-                print("   ⚠️  未找到 DeepSeek 模型，但有其他可用模型")
-                
     except Exception as e:
         print(f"   ❌ 獲取模型列表失敗: {e}")
         return False
     
-    # 3. 測試文本生成
-    print("\n3. 測試文本生成...")
-    try:
-        async with client:
-            models = await client.list_models()
-            if not models:
-                print("   ⚠️  沒有可用模型進行測試")
-                return False
-            
-            test_model = models[0].name
-            print(f"   使用模型: {test_model}")
-            
-            from mcp.llm.types import GenerateRequest
-            request = GenerateRequest(
-                model=test_model,
-                prompt="Hello! Please introduce yourself in one sentence.",
-            )
-            
-            print("   發送請求...")
-            response = await client.generate(request)
-            
-            print(f"   ✅ 生成成功:")
-            print(f"     模型: {response.model}")
-            print(f"     回應: {response.content[:200]}...")
-            print(f"     完成狀態: {'已完成' if response.done else '進行中'}")
-            
-            if response.prompt_eval_count:
-                print(f"     提示 Token 數: {response.prompt_eval_count}")
-            if response.eval_count:
-                print(f"     生成 Token 數: {response.eval_count}")
-                
-    except Exception as e:
-        print(f"   ❌ 文本生成失敗: {e}")
+    if not models:
+        print("   ⚠️  沒有可用模型進行測試")
+        return False
+    
+    test_model = models[0].name
+    # 只輸出前 200 字元，以串流讀取並於足夠時提前結束
+    stream_request = ChatRequest(
+        model=test_model,
+        messages=[
+            ChatMessage(role="user", content="Hello! Please introduce yourself in one sentence.")
+        ],
+        stream=True
+    )
+    chat_request = ChatRequest(
+        model=test_model,
+        messages=[
+            ChatMessage(role="system", content="You are a helpful AI assistant."),
+            ChatMessage(role="user", content="What is the capital of Taiwan? Answer in one sentence.")
+        ]
+    )
+    
+    # 3、4. 串流生成與聊天請求同時送出，結果依原順序輸出
+    print(f"\n   使用模型: {test_model}")
+    print("   同時發送生成與聊天請求...")
+    stream_text, chat_result = await asyncio.gather(
+        _read_stream_prefix(client, stream_request, 200),
+        client.chat(chat_request),
+        return_exceptions=True
+    )
+    
+    print("\n3. 測試串流生成...")
+    if isinstance(stream_text, Exception):
+        print(f"   ❌ 串流生成失敗: {stream_text}")
         return False
     
-    # 4. 測試聊天功能
+    print(f"   ✅ 生成成功:")
+    print(f"     回應: {stream_text[:200]}...")
+    
     print("\n4. 測試聊天功能...")
-    try:
-        async with client:
-            models = await client.list_models()
-            test_model = models[0].name
-            
-            messages = [
-                ChatMessage(role="system", content="You are a helpful AI assistant."),
-                ChatMessage(role="user", content="What is the capital of Taiwan? Answer in one sentence.")
-            ]
-            
-            from mcp.llm.types import ChatRequest
-            request = ChatRequest(
-                model=test_model,
-                messages=messages
-            )
-            
-            print(f"   使用模型: {test_model}")
-            print("   發送聊天請求...")
-            
-            response = await client.chat(request)
-            
-            print(f"   ✅ 聊天成功:")
-            print(f"     模型: {response.model}")
-            print(f"     回應: {response.content}")
-            
-    except Exception as e:
-        print(f"   ❌ 聊天功能測試失敗: {e}")
+    if isinstance(chat_result, Exception):
+        print(f"   ❌ 聊天功能測試失敗: {chat_result}")
         return False
     
+    print(f"   ✅ 聊天成功:")
+    print(f"     模型: {chat_result.model}")
+    print(f"     回應: {chat_result.content}")
+    
     return True
 
 
@@ -167,7 +172,7 @@ async def test_unified_manager():
             status = "✅ 可用" if available else "❌ 不可用"
             print(f"     {service}: {status}")
         
-        available_count = sum(1 for available in services.values() if available)
+        available_count = sum(map(bool, services.values()))
         if available_count > 0:
             print(f"   ✅ 找到 {available_count} 個可用服務")
         else:
@@ -293,32 +298,41 @@ async def test_deepseek_specific():
         test_model = deepseek_models[0].name
         print(f"\n   使用模型進行深度測試: {test_model}")
         
-        # 測試中文對話
-        print("\n   測試中文對話能力...")
-        messages = [
-            ChatMessage(role="user", content="請用繁體中文介紹一下台灣的美食文化，大約50字。")
+        # 三項測試彼此獨立，並行送出；同一模型的實際並行數由管理器的
+        # max_concurrent_per_model 控制（預設不限制），並行請求共用連線池
+        probes = [
+            (
+                "測試中文對話能力",
+                "中文回應",
+                "請用繁體中文介紹一下台灣的美食文化，大約50字。",
+                None,
+            ),
+            (
+                "測試程式碼生成能力",
+                "程式碼回應",
+                "請寫一個 Python 函數來計算斐波那契數列的第 n 項，並提供簡單的測試。",
+                300,
+            ),
+            (
+                "測試邏輯推理能力",
+                "推理回應",
+                "如果今天是星期三，那麼三天後是星期幾？請解釋你的推理過程。",
+                None,
+            ),
         ]
         
-        response = await manager.chat(test_model, messages)
-        print(f"   中文回應: {response.content}")
+        responses = await asyncio.gather(*(
+            manager.chat(test_model, [ChatMessage(role="user", content=prompt)])
+            for _, _, prompt, _ in probes
+        ))
         
-        # 測試程式碼生成
-        print("\n   測試程式碼生成能力...")
-        messages = [
-            ChatMessage(role="user", content="請寫一個 Python 函數來計算斐波那契數列的第 n 項，並提供簡單的測試。")
-        ]
-        
-        response = await manager.chat(test_model, messages)
-        print(f"   程式碼回應: {response.content[:300]}...")
-        
-        # 測試邏輯推理
-        print("\n   測試邏輯推理能力...")
-        messages = [
-            ChatMessage(role="user", content="如果今天是星期三，那麼三天後是星期幾？請解釋你的推理過程。")
-        ]
-        
-        response = await manager.chat(test_model, messages)
-        print(f"   推理回應: {response.content}")
+        # 依原順序輸出
+        for (title, label, _, limit), response in zip(probes, responses):
+            print(f"\n   {title}...")
+            if limit is None:
+                print(f"   {label}: {response.content}")
+            else:
+                print(f"   {label}: {response.content[:limit]}...")
         
         print("   ✅ DeepSeek 模型功能測試完成")
         
@@ -382,7 +396,7 @@ async def main():
 
 if __name__ == "__main__":
     try:
-        success = asyncio.run(main())
+        success = run_main(main())
         sys.exit(0 if success else 1)
     except KeyboardInterrupt:
         print("\n⚠️  測試被用戶中斷")
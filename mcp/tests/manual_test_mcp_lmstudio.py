@@ -14,32 +14,87 @@ python -m mcp.tests.manual_test_mcp_lmstudio
 3. LM Studio 的 Local Server 已啟動 (http://localhost:1234)
 """
 
-import asyncio
 import sys
-import json
+import re
+import time
+import uuid
+from contextlib import aclosing
 from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+from mcp import serialization
 from mcp.llm.unified_manager import UnifiedModelManager, LLMServiceType
 from mcp.llm.types import ChatMessage
+from mcp.config import get_config
+from mcp.tests.manual_output import gather_buffered
+from mcp.tests.manual_probe import service_reachable
+from mcp.tests.manual_loop import run_main
+
+
+_CJK_RE = re.compile(r'[\u4e00-\u9fff]')
+
+
+def _contains_chinese(text: str) -> bool:
+    """是否包含中文字符"""
+    return _CJK_RE.search(text) is not None
+
+
+def _has_function(text: str) -> bool:
+    """是否包含 Python 函數定義"""
+    return "def " in text and "return" in text
+
+
+# 測試結果記錄檔（JSONL，每個結果一行）；執行中斷時保留，下次執行沿用已通過的結果
+RESULTS_PATH = Path("mcp_lmstudio_results.jsonl")
+
+
+def _load_passed_results(path: Path) -> Dict[str, Dict[str, Any]]:
+    """讀取先前中斷的執行中已通過的測試結果（依測試名稱索引；略過的測試不計入）"""
+    passed = {}
+    try:
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    result = serialization.loads(line)
+                except serialization.JSONDecodeError:
+                    # 中斷時可能留下不完整的最後一行
+                    continue
+                if result.get("success") and not result.get("skipped"):
+                    passed[result["test"]] = result
+    except FileNotFoundError:
+        pass
+    return passed
 
 
 class MCPLMStudioTester:
     """MCP 系統與 LM Studio 整合測試器"""
     
-    def __init__(self):
+    def __init__(self, results_path: Path = RESULTS_PATH):
         self.manager = UnifiedModelManager(preferred_service=LLMServiceType.AUTO)
         self.test_results = []
+        self.results_path = results_path
+        self._passed_results = _load_passed_results(results_path)
+        # 無緩衝的附加寫入：每個結果以單次 write 寫入一行，中斷時不會遺失已完成的結果
+        self._results_file = open(results_path, "ab", buffering=0)
     
-    def log_test(self, test_name: str, success: bool, details: str = ""):
-        """記錄測試結果"""
+    def log_test(
+        self, test_name: str, success: bool, details: str = "", skipped: bool = False
+    ):
+        """記錄測試結果（略過的測試 success 為 False，不計入通過數）"""
         result = {
             "test": test_name,
-            "success": success,
+            "success": success and not skipped,
+            "skipped": skipped,
             "details": details,
             "timestamp": datetime.now().isoformat()
         }
         self.test_results.append(result)
+        self._results_file.write(serialization.dumps(result) + b"\n")
         
-        status = "✅ 通過" if success else "❌ 失敗"
+        if skipped:
+            status = "⏭️  略過"
+        else:
+            status = "✅ 通過" if success else "❌ 失敗"
         print(f"   {status}: {test_name}")
         if details:
             print(f"      詳細: {details}")
@@ -92,19 +147,53 @@ class MCPLMStudioTester:
             self.log_test("DeepSeek 模型檢測", False, f"模型檢測失敗: {e}")
             return None
     
+    async def _skip_unsupported(self, test_name: str, model_name: str) -> bool:
+        """模型已知不支援對話時記錄略過，省下一次注定失敗的 LLM 請求"""
+        # 模型資訊取自管理器已快取的模型索引，不會另外發出請求
+        model_info = await self.manager.get_model_info(model_name)
+        if model_info is None or not model_info.capabilities or "chat" in model_info.capabilities:
+            return False
+        
+        self.log_test(
+            test_name, False,
+            f"模型不支援對話（能力: {list(model_info.capabilities)}）",
+            skipped=True
+        )
+        return True
+    
+    async def _stream_until(
+        self,
+        model_name: str,
+        messages: List[ChatMessage],
+        done: Callable[[str], bool]
+    ) -> str:
+        """串流讀取回應，累積內容滿足 done 時即停止（其餘內容不再生成）"""
+        text = ""
+        async with aclosing(self.manager.chat_stream(model_name, messages)) as stream:
+            async for chunk in stream:
+                text += chunk
+                if done(text):
+                    break
+        return text
+    
     async def test_simple_dialogue(self, model_name: str):
         """測試簡單對話"""
         print("\n4. 測試簡單對話...")
+        if await self._skip_unsupported("簡單對話", model_name):
+            return True
+        
         try:
             messages = [
                 ChatMessage(role="user", content="Hello! Please respond with exactly 'MCP-LMStudio connection successful' to confirm the integration works.")
             ]
             
-            response = await self.manager.chat(model_name, messages)
+            # 只記錄前 100 字元，取得後即停止生成
+            content = await self._stream_until(
+                model_name, messages, lambda text: len(text) >= 100
+            )
             
-            if response and response.content:
-                success_indicator = "successful" in response.content.lower() or "成功" in response.content
-                self.log_test("簡單對話", True, f"模型回應: {response.content[:100]}...")
+            if content:
+                self.log_test("簡單對話", True, f"模型回應: {content[:100]}...")
                 return True
             else:
                 self.log_test("簡單對話", False, "模型未回應或回應為空")
@@ -116,17 +205,23 @@ class MCPLMStudioTester:
     async def test_chinese_dialogue(self, model_name: str):
         """測試中文對話"""
         print("\n5. 測試中文對話能力...")
+        if await self._skip_unsupported("中文對話", model_name):
+            return True
+        
         try:
             messages = [
                 ChatMessage(role="user", content="你好！請用繁體中文回答：什麼是人工智慧？請用一句話回答。")
             ]
             
-            response = await self.manager.chat(model_name, messages)
+            # 出現中文字符即可判定，不需等待完整回應
+            content = await self._stream_until(
+                model_name, messages, _contains_chinese
+            )
             
-            if response and response.content:
+            if content:
                 # 檢查是否包含中文字符
-                has_chinese = any('\u4e00' <= char <= '\u9fff' for char in response.content)
-                self.log_test("中文對話", has_chinese, f"回應: {response.content}")
+                has_chinese = _contains_chinese(content)
+                self.log_test("中文對話", has_chinese, f"回應: {content}")
                 return has_chinese
             else:
                 self.log_test("中文對話", False, "無中文回應")
@@ -138,15 +233,19 @@ class MCPLMStudioTester:
     async def test_code_generation(self, model_name: str):
         """測試程式碼生成"""
         print("\n6. 測試程式碼生成能力...")
+        if await self._skip_unsupported("程式碼生成", model_name):
+            return True
+        
         try:
             messages = [
                 ChatMessage(role="user", content="Please write a simple Python function to add two numbers. Just the function, no explanation.")
             ]
             
-            response = await self.manager.chat(model_name, messages)
+            # 函數定義與 return 都出現後即停止生成
+            content = await self._stream_until(model_name, messages, _has_function)
             
-            if response and response.content:
-                has_code = "def " in response.content and "return" in response.content
+            if content:
+                has_code = _has_function(content)
                 self.log_test("程式碼生成", has_code, f"生成代碼包含函數定義: {'是' if has_code else '否'}")
                 return has_code
             else:
@@ -159,18 +258,28 @@ class MCPLMStudioTester:
     async def test_context_memory(self, model_name: str):
         """測試上下文記憶"""
         print("\n7. 測試上下文記憶...")
+        if await self._skip_unsupported("上下文記憶", model_name):
+            return True
+        
         try:
+            # 兩輪使用相同的對話識別碼，讓後端重用第一輪的提示快取
+            conversation_id = uuid.uuid4().hex
+            
             # 第一輪對話
             messages = [
                 ChatMessage(role="user", content="My name is Alex. Remember this.")
             ]
-            response1 = await self.manager.chat(model_name, messages)
+            response1 = await self.manager.chat(
+                model_name, messages, conversation_id=conversation_id
+            )
             
             # 第二輪對話，測試是否記住名字
             messages.append(ChatMessage(role="assistant", content=response1.content))
             messages.append(ChatMessage(role="user", content="What is my name?"))
             
-            response2 = await self.manager.chat(model_name, messages)
+            response2 = await self.manager.chat(
+                model_name, messages, conversation_id=conversation_id
+            )
             
             if response2 and response2.content:
                 remembers_name = "alex" in response2.content.lower()
@@ -184,29 +293,31 @@ class MCPLMStudioTester:
             return False
     
     async def test_performance_metrics(self, model_name: str):
-        """測試性能指標"""
+        """測試性能指標（main 已預熱模型，量測值不含模型載入時間）"""
         print("\n8. 測試性能指標...")
+        if await self._skip_unsupported("性能指標", model_name):
+            return True
+        
         try:
             messages = [
                 ChatMessage(role="user", content="Count from 1 to 10.")
             ]
             
-            start_time = datetime.now()
+            # 量測延遲使用單調的高解析度計時器；datetime 只用於記錄時間戳
+            start_ns = time.perf_counter_ns()
             response = await self.manager.chat(model_name, messages)
-            end_time = datetime.now()
-            
-            duration = (end_time - start_time).total_seconds()
+            duration_ms = (time.perf_counter_ns() - start_ns) / 1e6
             
             if response:
                 metrics = {
-                    "回應時間": f"{duration:.2f} 秒",
+                    "回應時間": f"{duration_ms:.1f} 毫秒",
                     "回應長度": len(response.content) if response.content else 0,
                     "Token 使用": {
                         "輸入": response.prompt_eval_count or "未知",
                         "輸出": response.eval_count or "未知"
                     }
                 }
-                self.log_test("性能指標", True, json.dumps(metrics, ensure_ascii=False, indent=2))
+                self.log_test("性能指標", True, serialization.dumps_indented(metrics).decode())
                 return True
             else:
                 self.log_test("性能指標", False, "無性能數據")
@@ -215,10 +326,30 @@ class MCPLMStudioTester:
             self.log_test("性能指標", False, f"性能測試失敗: {e}")
             return False
     
+    async def run_unless_passed(
+        self, test_name: str, test: Callable[[], Awaitable[bool]]
+    ) -> bool:
+        """執行測試；先前中斷的執行中已通過者直接沿用其結果"""
+        previous = self._passed_results.get(test_name)
+        if previous is None:
+            return await test()
+        
+        self.test_results.append(previous)
+        print(f"   ⏭️  略過: {test_name}（先前中斷的執行中已通過）")
+        return True
+    
+    def close_results(self, completed: bool) -> None:
+        """關閉結果記錄檔；整輪測試完成時刪除，下次執行重新開始"""
+        self._results_file.close()
+        if completed:
+            self.results_path.unlink(missing_ok=True)
+    
     def generate_report(self):
         """生成測試報告"""
         passed = sum(1 for result in self.test_results if result["success"])
-        total = len(self.test_results)
+        skipped = sum(1 for result in self.test_results if result.get("skipped"))
+        # 略過的測試不計入通過與失敗，也不計入成功率
+        total = len(self.test_results) - skipped
         
         print(f"\n{'='*60}")
         print(f"📊 MCP-LMStudio 整合測試報告")
@@ -226,7 +357,8 @@ class MCPLMStudioTester:
         print(f"總測試數: {total}")
         print(f"通過測試: {passed}")
         print(f"失敗測試: {total - passed}")
-        print(f"成功率: {(passed/total*100):.1f}%")
+        print(f"略過測試: {skipped}")
+        print(f"成功率: {(passed/total*100) if total else 0.0:.1f}%")
         
         if passed == total:
             print(f"\n🎉 所有測試通過！MCP 系統與 LM Studio 整合成功")
@@ -237,7 +369,10 @@ class MCPLMStudioTester:
         
         print(f"\n📋 詳細結果:")
         for result in self.test_results:
-            status = "✅" if result["success"] else "❌"
+            if result.get("skipped"):
+                status = "⏭️ "
+            else:
+                status = "✅" if result["success"] else "❌"
             print(f"   {status} {result['test']}")
             if not result["success"] and result["details"]:
                 print(f"      📝 {result['details']}")
@@ -250,7 +385,14 @@ async def main():
     print("🚀 開始 MCP 系統調用 LM Studio 整合測試")
     print("="*60)
     
+    # LM Studio 未啟動時立即結束，不必初始化管理器或等待請求逾時
+    config = get_config()
+    if not await service_reachable(config.lmstudio_host, config.lmstudio_port):
+        print(f"❌ LM Studio 不可用 ({config.lmstudio_host}:{config.lmstudio_port})")
+        return False
+    
     tester = MCPLMStudioTester()
+    completed = False
     
     try:
         # 測試序列
@@ -272,12 +414,27 @@ async def main():
         
         print(f"\n🎯 使用模型進行完整測試: {model_name}")
         
-        # 執行所有對話測試
-        await tester.test_simple_dialogue(model_name)
-        await tester.test_chinese_dialogue(model_name)
-        await tester.test_code_generation(model_name)
-        await tester.test_context_memory(model_name)
-        await tester.test_performance_metrics(model_name)
+        # 先預熱模型，之後各測試（含性能指標）量測的都是模型已載入後的延遲
+        try:
+            await tester.manager.warmup(model_name)
+        except Exception as e:
+            print(f"⚠️  模型預熱失敗，首個測試可能包含模型載入時間: {e}")
+        
+        # 彼此獨立的對話測試並行送出，輸出依原順序寫出；同一模型的實際
+        # 並行數由管理器的 max_concurrent_per_model 控制（預設不限制）
+        # 先前中斷的執行中已通過的測試直接沿用結果，只執行其餘測試
+        for _, output in await gather_buffered(
+            tester.run_unless_passed("簡單對話", lambda: tester.test_simple_dialogue(model_name)),
+            tester.run_unless_passed("中文對話", lambda: tester.test_chinese_dialogue(model_name)),
+            tester.run_unless_passed("程式碼生成", lambda: tester.test_code_generation(model_name)),
+        ):
+            sys.stdout.write(output)
+        
+        # 上下文記憶需依序進行兩輪對話；性能指標量測單一請求的回應時間，
+        # 與其他請求並行會把排隊時間算入，因此兩者維持依序執行
+        await tester.run_unless_passed("上下文記憶", lambda: tester.test_context_memory(model_name))
+        await tester.run_unless_passed("性能指標", lambda: tester.test_performance_metrics(model_name))
+        completed = True
         
         # 生成報告
         success = tester.generate_report()
@@ -298,6 +455,7 @@ async def main():
         return False
     finally:
         # 清理資源
+        tester.close_results(completed)
         try:
             await tester.manager.cleanup()
         except:
@@ -306,7 +464,7 @@ async def main():
 
 if __name__ == "__main__":
     try:
-        success = asyncio.run(main())
+        success = run_main(main())
         sys.exit(0 if success else 1)
     except Exception as e:
         print(f"❌ 程式執行失敗: {e}")
@@ -11,78 +11,118 @@ docker compose exec django python mcp/tests/manual_test_ollama.py
 
 import asyncio
 import sys
-from mcp.llm.client import OllamaClient
-from mcp.llm.manager import ModelManager
-from mcp.llm.types import ChatMessage, GenerateRequest, ChatRequest
+from typing import TYPE_CHECKING, List, Optional
+from mcp.config import get_config
+from mcp.tests.manual_probe import service_reachable
+from mcp.tests.manual_loop import run_main
 
+# LLM 相關模組延後到確認 Ollama 可連線後才匯入
+if TYPE_CHECKING:
+    from mcp.llm.client import OllamaClient
+    from mcp.llm.types import LLMResponse
 
-async def test_ollama_client_manual():
+
+async def test_ollama_client_manual(client: "OllamaClient") -> bool:
     """測試 Ollama 客戶端基本功能"""
     print("=== Ollama 客戶端手動測試 ===")
     
-    client = OllamaClient()
+    # 健康檢查與模型列表互不相依，同時送出後依原順序輸出
+    health, models = await asyncio.gather(
+        client.health_check(),
+        client.list_models(),
+        return_exceptions=True
+    )
     
     # 1. 測試健康檢查
     print("1. 測試 Ollama 服務健康檢查...")
-    try:
-        health = await client.health_check()
-        print(f"   健康檢查結果: {'✅ 正常' if health else '❌ 異常'}")
-        
-        if not health:
-            print("   ⚠️  Ollama 服務未運行，跳過後續測試")
-            return False
-    except Exception as e:
-        print(f"   ❌ 健康檢查失敗: {e}")
+    if isinstance(health, Exception):
+        print(f"   ❌ 健康檢查失敗: {health}")
         print("   ⚠️  請確保 Ollama 服務正在運行")
         return False
     
+    print(f"   健康檢查結果: {'✅ 正常' if health else '❌ 異常'}")
+    if not health:
+        print("   ⚠️  Ollama 服務未運行，跳過後續測試")
+        return False
+    
     # 2. 測試模型列表
     print("\n2. 測試模型列表...")
-    try:
-        async with client:
-            models = await client.list_models()
-            print(f"   找到 {len(models)} 個模型:")
-            for model in models[:3]:  # 只顯示前3個
-                print(f"     - {model.name} (大小: {model.size} bytes)")
-    except Exception as e:
-        print(f"   ❌ 獲取模型列表失敗: {e}")
+    if isinstance(models, Exception):
+        print(f"   ❌ 獲取模型列表失敗: {models}")
+    else:
+        print(f"   找到 {len(models)} 個模型:")
+        for model in models[:3]:  # 只顯示前3個
+            print(f"     - {model.name} (大小: {model.size} bytes)")
     
     # 3. 測試文本生成（需要模型）
     print("\n3. 測試文本生成...")
     try:
-        async with client:
-            # 嘗試使用常見的小模型
-            test_models = ["llama2", "llama3.2", "qwen2", "phi3"]
-            
-            for model_name in test_models:
-                try:
-                    print(f"   嘗試模型: {model_name}")
-                    request = GenerateRequest(
-                        model=model_name,
-                        prompt="Hello, how are you? Please respond in one sentence.",
-                    )
-                    
-                    response = await client.generate(request)
-                    print(f"   ✅ 生成成功:")
-                    print(f"     模型: {response.model}")
-                    print(f"     回應: {response.content[:100]}...")
-                    break
-                except Exception as e:
-                    print(f"   ❌ 模型 {model_name} 生成失敗: {e}")
-                    continue
-            else:
-                print("   ⚠️  沒有可用的模型進行測試")
+        # 嘗試使用常見的小模型
+        test_models = ["llama2", "llama3.2", "qwen2", "phi3"]
+        print(f"   同時嘗試模型: {', '.join(test_models)}")
+        
+        response = await _generate_first_available(
+            client,
+            test_models,
+            "Hello, how are you? Please respond in one sentence.",
+        )
+        if response is not None:
+            print(f"   ✅ 生成成功:")
+            print(f"     模型: {response.model}")
+            print(f"     回應: {response.content[:100]}...")
+        else:
+            print("   ⚠️  沒有可用的模型進行測試")
     except Exception as e:
         print(f"   ❌ 文本生成測試失敗: {e}")
     
     return True
 
 
-async def test_model_manager_manual():
+async def _generate_first_available(
+    client: "OllamaClient", model_names: List[str], prompt: str
+) -> Optional["LLMResponse"]:
+    """同時向各模型送出生成請求，返回最先成功的回應並取消其餘請求
+    
+    依序嘗試時每個未安裝的模型都要等待失敗才換下一個；同時送出後等待時間
+    取決於最快成功的模型。全部失敗時返回 None。
+    """
+    from mcp.llm.types import GenerateRequest
+    
+    tasks = {
+        asyncio.ensure_future(
+            client.generate(GenerateRequest(model=name, prompt=prompt))
+        ): name
+        for name in model_names
+    }
+    pending = set(tasks)
+    response = None
+    try:
+        while pending and response is None:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is not None:
+                    print(f"   ❌ 模型 {tasks[task]} 生成失敗: {task.exception()}")
+                elif response is None:
+                    response = task.result()
+    finally:
+        # 取消尚未完成的請求，並等待其關閉 HTTP 連線後再返回
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    
+    return response
+
+
+async def test_model_manager_manual(client: "OllamaClient"):
     """測試模型管理器功能"""
     print("\n=== 模型管理器手動測試 ===")
     
-    manager = ModelManager()
+    from mcp.llm.manager import ModelManager
+    from mcp.llm.types import ChatMessage
+    
+    manager = ModelManager(client=client)
     
     # 1. 測試初始化
     print("1. 測試管理器初始化...")
@@ -157,12 +197,25 @@ async def main():
     print("🚀 開始 MCP Ollama 整合手動測試")
     print("=" * 50)
     
-    # 測試 Ollama 客戶端
-    client_success = await test_ollama_client_manual()
-    
-    if client_success:
-        # 測試模型管理器
-        await test_model_manager_manual()
+    # Ollama 未啟動時立即結束，不必載入 LLM 堆疊或等待請求逾時
+    config = get_config()
+    if await service_reachable(config.ollama_host, config.ollama_port):
+        from mcp.llm.client import OllamaClient
+        
+        # 客戶端測試與模型管理器共用同一個客戶端，整個執行期間只建立一個連線池
+        client = OllamaClient(config=config)
+        try:
+            # 測試 Ollama 客戶端
+            client_success = await test_ollama_client_manual(client)
+            
+            if client_success:
+                # 測試模型管理器
+                await test_model_manager_manual(client)
+        finally:
+            await client.close()
+    else:
+        print(f"❌ Ollama 不可用 ({config.ollama_host}:{config.ollama_port})")
+        client_success = False
     
     print("\n" + "=" * 50)
     print("🏁 測試完成")
@@ -176,7 +229,7 @@ async def main():
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        run_main(main())
     except KeyboardInterrupt:
         print("\n⚠️  測試被用戶中斷")
         sys.exit(0)
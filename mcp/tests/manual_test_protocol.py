@@ -7,10 +7,88 @@ docker compose exec django python mcp/tests/manual_test_protocol.py
 """
 
 import asyncio
-import json
 import sys
+from typing import Any, Callable, Optional
+import fastjsonschema
+from mcp import serialization
 from mcp.protocol.handler import MCPHandler
 from mcp.protocol.types import MCPConnectionState
+from mcp.tests.manual_output import run_async_tests
+from mcp.tests.manual_loop import run_main
+
+
+# JSON-RPC 2.0 回應信封的預編譯驗證器（fastjsonschema 將 schema 編譯為 Python 函數）
+_validate_success = fastjsonschema.compile({
+    "type": "object",
+    "required": ["jsonrpc", "id", "result"],
+    "properties": {"jsonrpc": {"const": "2.0"}},
+    "not": {"required": ["error"]},
+})
+_validate_error = fastjsonschema.compile({
+    "type": "object",
+    "required": ["jsonrpc", "id", "error"],
+    "properties": {
+        "jsonrpc": {"const": "2.0"},
+        "error": {
+            "type": "object",
+            "required": ["code", "message"],
+            "properties": {
+                "code": {"type": "integer"},
+                "message": {"type": "string"},
+            },
+        },
+    },
+    "not": {"required": ["result"]},
+})
+_validate_pong = fastjsonschema.compile({
+    "type": "object",
+    "required": ["result"],
+    "properties": {
+        "result": {
+            "type": "object",
+            "required": ["pong"],
+            "properties": {"pong": {"const": True}},
+        },
+    },
+})
+_validate_initialize = fastjsonschema.compile({
+    "type": "object",
+    "required": ["result"],
+    "properties": {
+        "result": {
+            "type": "object",
+            "required": ["protocolVersion", "serverInfo"],
+            "properties": {
+                "protocolVersion": {"const": "1.0"},
+                "serverInfo": {
+                    "type": "object",
+                    "required": ["name", "version"],
+                },
+            },
+        },
+    },
+})
+
+
+def _matches(validate: Callable[[Any], Any], message: Any) -> bool:
+    """訊息是否通過指定的驗證器"""
+    try:
+        validate(message)
+    except fastjsonschema.JsonSchemaException:
+        return False
+    return True
+
+
+def _is_success(message: Any) -> bool:
+    """是否為成功回應"""
+    return _matches(_validate_success, message)
+
+
+def _error_code(message: Any) -> Optional[int]:
+    """錯誤回應的錯誤代碼；非錯誤回應時返回 None"""
+    if not _matches(_validate_error, message):
+        return None
+    return message["error"]["code"]
 
 
 async def test_basic_protocol():
@@ -28,14 +106,14 @@ async def test_basic_protocol():
         "params": {}
     }
     
-    response = await handler.handle_message(json.dumps(ping_request))
+    response = await handler.handle_message(serialization.dumps(ping_request))
     print(f"   請求: {ping_request['method']}")
     print(f"   回應: {response}")
     
     # 驗證回應格式
     try:
-        response_data = json.loads(response)
-        if response_data.get("result", {}).get("pong") is True:
+        response_data = serialization.loads(response)
+        if _is_success(response_data) and _matches(_validate_pong, response_data):
             print("   ✅ ping 測試通過")
         else:
             print("   ❌ ping 回應格式錯誤")
@@ -44,6 +122,35 @@ async def test_basic_protocol():
         print(f"   ❌ ping 回應解析失敗: {e}")
         return False
     
+    # 2. 測試 id 為 null 的請求（JSON-RPC 2.0 中仍屬請求，必須回應）
+    print("\n2. 測試 id 為 null 的 ping 請求...")
+    null_id_request = {
+        "jsonrpc": "2.0",
+        "id": None,
+        "method": "ping"
+    }
+    
+    response = await handler.handle_message(serialization.dumps(null_id_request))
+    print(f"   回應: {response}")
+    
+    if response is None:
+        print("   ❌ id 為 null 的請求被當作通知，未收到回應")
+        return False
+    try:
+        response_data = serialization.loads(response)
+        if (
+            _is_success(response_data)
+            and response_data["id"] is None
+            and _matches(_validate_pong, response_data)
+        ):
+            print("   ✅ null id 測試通過")
+        else:
+            print("   ❌ null id 回應格式錯誤")
+            return False
+    except Exception as e:
+        print(f"   ❌ null id 回應解析失敗: {e}")
+        return False
+    
     return True
 
 
@@ -83,7 +190,7 @@ async def test_initialization_flow():
         }
     }
     
-    response = await handler.handle_message(json.dumps(init_request))
+    response = await handler.handle_message(serialization.dumps(init_request))
     print(f"   初始化請求已發送")
     
     # 檢查連接狀態
@@ -96,14 +203,14 @@ async def test_initialization_flow():
     
     # 驗證初始化回應
     try:
-        response_data = json.loads(response)
+        response_data = serialization.loads(response)
         server_info = response_data.get("result", {})
         
         print(f"   協議版本: {server_info.get('protocolVersion')}")
         print(f"   伺服器名稱: {server_info.get('serverInfo', {}).get('name')}")
         print(f"   伺服器版本: {server_info.get('serverInfo', {}).get('version')}")
         
-        if server_info.get("protocolVersion") == "1.0":
+        if _is_success(response_data) and _matches(_validate_initialize, response_data):
             print("   ✅ 初始化回應正確")
         else:
             print("   ❌ 初始化回應格式錯誤")
@@ -120,7 +227,7 @@ async def test_initialization_flow():
         "params": {}
     }
     
-    response = await handler.handle_message(json.dumps(initialized_notification))
+    response = await handler.handle_message(serialization.dumps(initialized_notification))
     print(f"   初始化完成通知已發送")
     print(f"   通知回應: {response}")  # 應該是 None
     
@@ -142,17 +249,42 @@ async def test_error_handling():
     
     handler = MCPHandler()
     
-    # 1. 測試無效 JSON
-    print("1. 測試無效 JSON...")
     invalid_json = "{ invalid json }"
+    invalid_method_request = {
+        "jsonrpc": "2.0",
+        "id": 3,
+        "method": "unknown_method",
+        "params": {}
+    }
+    invalid_version_request = {
+        "jsonrpc": "2.0",
+        "id": 4,
+        "method": "initialize",
+        "params": {
+            "protocolVersion": "999.0",  # 不支援的版本
+            "clientInfo": {
+                "name": "test-client",
+                "version": "1.0.0"
+            }
+        }
+    }
+    
+    # 錯誤路徑不會改變處理器狀態（initialize 在變更狀態前即檢查協議版本），
+    # 三個案例可在同一個處理器上並行送出，再依序驗證
+    json_response, method_response, version_response = await asyncio.gather(
+        handler.handle_message(invalid_json),
+        handler.handle_message(serialization.dumps(invalid_method_request)),
+        handler.handle_message(serialization.dumps(invalid_version_request)),
+    )
     
-    response = await handler.handle_message(invalid_json)
+    # 1. 測試無效 JSON
+    print("1. 測試無效 JSON...")
     print(f"   無效 JSON: {invalid_json}")
-    print(f"   錯誤回應: {response}")
+    print(f"   錯誤回應: {json_response}")
     
     try:
-        error_response = json.loads(response)
-        if error_response.get("error", {}).get("code") == -32700:
+        error_response = serialization.loads(json_response)
+        if _error_code(error_response) == -32700:
             print("   ✅ JSON 解析錯誤處理正確")
         else:
             print("   ❌ JSON 解析錯誤代碼不正確")
@@ -163,19 +295,11 @@ async def test_error_handling():
     
     # 2. 測試無效方法
     print("\n2. 測試無效方法...")
-    invalid_method_request = {
-        "jsonrpc": "2.0",
-        "id": 3,
-        "method": "unknown_method",
-        "params": {}
-    }
-    
-    response = await handler.handle_message(json.dumps(invalid_method_request))
     print(f"   無效方法請求: {invalid_method_request['method']}")
     
     try:
-        error_response = json.loads(response)
-        if error_response.get("error", {}).get("code") == -32601:
+        error_response = serialization.loads(method_response)
+        if _error_code(error_response) == -32601:
             print("   ✅ 方法未找到錯誤處理正確")
         else:
             print("   ❌ 方法未找到錯誤代碼不正確")
@@ -186,25 +310,11 @@ async def test_error_handling():
     
     # 3. 測試無效協議版本
     print("\n3. 測試無效協議版本...")
-    invalid_version_request = {
-        "jsonrpc": "2.0",
-        "id": 4,
-        "method": "initialize",
-        "params": {
-            "protocolVersion": "999.0",  # 不支援的版本
-            "clientInfo": {
-                "name": "test-client",
-                "version": "1.0.0"
-            }
-        }
-    }
-    
-    response = await handler.handle_message(json.dumps(invalid_version_request))
     print(f"   無效協議版本: 999.0")
     
     try:
-        error_response = json.loads(response)
-        if "error" in error_response:
+        error_response = serialization.loads(version_response)
+        if _error_code(error_response) is not None:
             print("   ✅ 協議版本錯誤處理正確")
         else:
             print("   ❌ 協議版本錯誤未正確處理")
@@ -233,7 +343,7 @@ async def test_shutdown_flow():
         }
     }
     
-    await handler.handle_message(json.dumps(init_request))
+    await handler.handle_message(serialization.dumps(init_request))
     
     initialized_notification = {
         "jsonrpc": "2.0",
@@ -241,7 +351,7 @@ async def test_shutdown_flow():
         "params": {}
     }
     
-    await handler.handle_message(json.dumps(initialized_notification))
+    await handler.handle_message(serialization.dumps(initialized_notification))
     
     # 確認已連接
     if handler.get_state() != MCPConnectionState.CONNECTED:
@@ -258,7 +368,7 @@ async def test_shutdown_flow():
         "params": {}
     }
     
-    response = await handler.handle_message(json.dumps(shutdown_request))
+    response = await handler.handle_message(serialization.dumps(shutdown_request))
     print("關閉請求已發送")
     
     # 檢查狀態
@@ -271,8 +381,8 @@ async def test_shutdown_flow():
     
     # 驗證關閉回應
     try:
-        response_data = json.loads(response)
-        if "result" in response_data:
+        response_data = serialization.loads(response)
+        if _is_success(response_data):
             print("✅ 關閉流程正確")
             return True
         else:
@@ -332,26 +442,6 @@ async def test_message_formats():
         }
     ]
     
-    for test in request_tests:
-        try:
-            response = await handler.handle_message(json.dumps(test["message"]))
-            response_data = json.loads(response)
-            
-            has_error = "error" in response_data
-            success = not has_error if test["should_succeed"] else has_error
-            
-            status = "✅" if success else "❌"
-            print(f"   {status} {test['name']}: {'通過' if success else '失敗'}")
-            
-            if not success:
-                return False
-                
-        except Exception as e:
-            print(f"   ❌ {test['name']} 測試異常: {e}")
-            return False
-    
-    # 2. 測試通知訊息格式
-    print("\n2. 測試通知訊息格式...")
     notification_tests = [
         {
             "name": "標準通知",
@@ -372,21 +462,56 @@ async def test_message_formats():
         }
     ]
     
+    # 請求以一個 JSON-RPC 批次陣列送出，回應以各自唯一的 id 對應
+    batch = [test["message"] for test in request_tests]
+    try:
+        response = await handler.handle_message(serialization.dumps(batch))
+        response_list = serialization.loads(response)
+    except Exception as e:
+        print(f"   ❌ 批次請求測試異常: {e}")
+        return False
+    
+    # 每個請求恰好一個回應，且 id 不重複（避免 id 為 null 的回應互相覆蓋）
+    responses = {item.get("id"): item for item in response_list}
+    if len(response_list) != len(request_tests) or len(responses) != len(response_list):
+        print(f"   ❌ 批次回應數量或 id 不符: {response_list}")
+        return False
+    
+    for test in request_tests:
+        response_data = responses.get(test["message"]["id"])
+        if response_data is None:
+            print(f"   ❌ {test['name']}: 缺少回應")
+            return False
+        
+        if test["should_succeed"]:
+            success = _is_success(response_data)
+        else:
+            success = _error_code(response_data) is not None
+        
+        status = "✅" if success else "❌"
+        print(f"   {status} {test['name']}: {'通過' if success else '失敗'}")
+        
+        if not success:
+            return False
+    
+    # 2. 測試通知訊息格式
+    print("\n2. 測試通知訊息格式...")
+    # 通知逐一送出，每一則都不應產生回應
     for test in notification_tests:
         try:
-            response = await handler.handle_message(json.dumps(test["message"]))
-            
-            # 通知應該返回 None（無回應）
-            success = response is None if test["should_succeed"] else response is not None
-            
-            status = "✅" if success else "❌"
-            print(f"   {status} {test['name']}: {'通過' if success else '失敗'}")
-            
-            if not success:
-                return False
-                
+            response = await handler.handle_message(
+                serialization.dumps(test["message"])
+            )
         except Exception as e:
-            print(f"   ❌ {test['name']} 測試異常: {e}")
+            print(f"   ❌ {test['name']}: 異常 {e}")
+            return False
+        
+        success = (response is None) == test["should_succeed"]
+        
+        status = "✅" if success else "❌"
+        print(f"   {status} {test['name']}: {'通過' if success else '失敗'}")
+        
+        if not success:
             return False
     
     return True
@@ -408,16 +533,12 @@ async def main():
     passed = 0
     total = len(tests)
     
-    for test_name, test_func in tests:
-        print(f"\n📋 執行測試: {test_name}")
-        try:
-            if await test_func():
-                passed += 1
-                print(f"✅ {test_name} 測試通過")
-            else:
-                print(f"❌ {test_name} 測試失敗")
-        except Exception as e:
-            print(f"❌ {test_name} 測試異常: {e}")
+    # 各測試使用各自的 MCPHandler（初始化與關閉流程亦各自建立），
+    # 彼此不共享狀態，並行執行後依原順序輸出各自的內容
+    for ok, output in await run_async_tests(tests):
+        sys.stdout.write(output)
+        if ok:
+            passed += 1
     
     print("\n" + "=" * 50)
     print(f"🏁 測試完成: {passed}/{total} 通過")
@@ -432,7 +553,7 @@ async def main():
 
 if __name__ == "__main__":
     try:
-        success = asyncio.run(main())
+        success = run_main(main())
         sys.exit(0 if success else 1)
     except KeyboardInterrupt:
         print("\n⚠️  測試被用戶中斷")
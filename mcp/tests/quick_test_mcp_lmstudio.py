@@ -5,10 +5,10 @@ MCP-LMStudio 快速整合測試
 快速驗證 MCP 系統與 LM Studio 的基本連接和對話功能
 """
 
-import asyncio
 import sys
-from mcp.llm.unified_manager import UnifiedModelManager, LLMServiceType
-from mcp.llm.types import ChatMessage
+from mcp.config import get_config
+from mcp.tests.manual_probe import service_reachable
+from mcp.tests.manual_loop import run_main
 
 
 async def quick_test():
@@ -16,6 +16,15 @@ async def quick_test():
     print("🔍 MCP-LMStudio 快速整合測試")
     print("=" * 50)
     
+    # LM Studio 未啟動時立即結束，不必載入 LLM 堆疊
+    config = get_config()
+    if not await service_reachable(config.lmstudio_host, config.lmstudio_port):
+        print(f"❌ LM Studio 不可用 ({config.lmstudio_host}:{config.lmstudio_port})")
+        return False
+    
+    from mcp.llm.unified_manager import UnifiedModelManager, LLMServiceType
+    from mcp.llm.types import ChatMessage
+    
     manager = UnifiedModelManager(preferred_service=LLMServiceType.AUTO)
     
     try:
@@ -59,5 +68,5 @@ async def quick_test():
 
 
 if __name__ == "__main__":
-    success = asyncio.run(quick_test())
+    success = run_main(quick_test())
     sys.exit(0 if success else 1)
\ No newline at end of file
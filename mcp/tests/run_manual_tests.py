@@ -12,39 +12,169 @@ docker compose exec django python mcp/tests/run_manual_tests.py --test config
 docker compose exec django python mcp/tests/run_manual_tests.py --test protocol
 docker compose exec django python mcp/tests/run_manual_tests.py --test connectors
 docker compose exec django python mcp/tests/run_manual_tests.py --test ollama
+
+預設在同一個直譯器中依序執行各腳本（省去每個腳本重新啟動直譯器與匯入模組的時間）；
+加上 --subprocess 則改為在獨立子程序中並行執行。
 """
 
 import argparse
 import asyncio
+import io
+import os
+import runpy
 import sys
-import subprocess
+from contextlib import redirect_stderr, redirect_stdout
 from pathlib import Path
+from typing import Any, Dict, List, Tuple
+import mcp.config
+from mcp.tests.manual_loop import run_main
 
 
-def run_test_script(script_name: str, description: str) -> bool:
-    """執行測試腳本"""
-    print(f"\n{'='*60}")
-    print(f"🧪 執行測試: {description}")
-    print(f"📜 腳本: {script_name}")
-    print(f"{'='*60}")
+def _script_header(script_name: str, description: str) -> List[str]:
+    """測試輸出的標題行"""
+    return [
+        f"\n{'='*60}",
+        f"🧪 執行測試: {description}",
+        f"📜 腳本: {script_name}",
+        f"{'='*60}",
+    ]
+
+
+def run_test_in_process(script_name: str, description: str) -> Tuple[bool, str]:
+    """在目前的直譯器中執行測試腳本，返回結果與完整輸出
+    
+    已匯入的模組直接沿用；腳本可能修改的環境變數與全域配置於執行後還原，
+    避免影響之後的腳本（例如配置測試會替換全域配置）。
+    """
+    lines = _script_header(script_name, description)
+    buffer = io.StringIO()
+    saved_environ = os.environ.copy()
+    saved_config = mcp.config._global_config
     
     try:
-        # 執行測試腳本
-        result = subprocess.run([
-            sys.executable, 
-            str(Path(__file__).parent / script_name)
-        ], capture_output=False, text=True)
+        with redirect_stdout(buffer), redirect_stderr(buffer):
+            try:
+                runpy.run_path(
+                    str(Path(__file__).parent / script_name), run_name="__main__"
+                )
+                exit_code = 0
+            except SystemExit as e:
+                exit_code = 0 if e.code is None else e.code
+        lines.append(buffer.getvalue().rstrip("\n"))
         
-        if result.returncode == 0:
-            print(f"\n✅ {description} 測試完成")
-            return True
+        if exit_code == 0:
+            lines.append(f"\n✅ {description} 測試完成")
+            success = True
         else:
-            print(f"\n❌ {description} 測試失敗 (退出碼: {result.returncode})")
-            return False
+            lines.append(f"\n❌ {description} 測試失敗 (退出碼: {exit_code})")
+            success = False
             
     except Exception as e:
-        print(f"\n❌ {description} 測試異常: {e}")
-        return False
+        lines.append(buffer.getvalue().rstrip("\n"))
+        lines.append(f"\n❌ {description} 測試異常: {e}")
+        success = False
+    finally:
+        os.environ.clear()
+        os.environ.update(saved_environ)
+        mcp.config._global_config = saved_config
+    
+    return success, "\n".join(lines) + "\n"
+
+
+def run_tests_in_process(
+    tests_to_run: List[Tuple[str, Dict[str, Any]]], continue_on_error: bool
+) -> Dict[str, bool]:
+    """在目前的直譯器中依序執行各測試腳本
+    
+    腳本共用 sys.stdout 與全域配置，無法安全地並行，因此依序執行。
+    """
+    results = {}
+    for test_name, config in tests_to_run:
+        success, output = run_test_in_process(config["script"], config["description"])
+        sys.stdout.write(output)
+        results[test_name] = success
+        
+        if not success and not continue_on_error:
+            print(f"\n⚠️  測試 '{test_name}' 失敗，停止執行")
+            break
+    
+    return results
+
+
+async def run_test_script(script_name: str, description: str) -> Tuple[bool, str]:
+    """執行測試腳本，返回結果與完整輸出
+    
+    子程序的 stdout 與 stderr 合併擷取，由呼叫端整段寫出，並行執行時輸出不會交錯。
+    """
+    lines = _script_header(script_name, description)
+    
+    try:
+        # 執行測試腳本
+        process = await asyncio.create_subprocess_exec(
+            sys.executable,
+            str(Path(__file__).parent / script_name),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+        try:
+            output, _ = await process.communicate()
+        except asyncio.CancelledError:
+            # 其他測試失敗而停止執行時，結束仍在執行的子程序
+            process.kill()
+            await process.wait()
+            raise
+        lines.append(output.decode(errors="replace").rstrip("\n"))
+        
+        if process.returncode == 0:
+            lines.append(f"\n✅ {description} 測試完成")
+            success = True
+        else:
+            lines.append(f"\n❌ {description} 測試失敗 (退出碼: {process.returncode})")
+            success = False
+            
+    except OSError as e:
+        lines.append(f"\n❌ {description} 測試異常: {e}")
+        success = False
+    
+    return success, "\n".join(lines) + "\n"
+
+
+async def run_tests(
+    tests_to_run: List[Tuple[str, Dict[str, Any]]], continue_on_error: bool
+) -> Dict[str, bool]:
+    """並行執行各測試腳本，依完成順序輸出結果
+    
+    各腳本彼此獨立，總執行時間取決於最慢的腳本而非所有腳本的總和。
+    未設定 continue_on_error 時，第一個失敗的測試會停止其餘仍在執行的測試。
+    """
+    tasks = {
+        asyncio.ensure_future(
+            run_test_script(config["script"], config["description"])
+        ): test_name
+        for test_name, config in tests_to_run
+    }
+    results = {}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                test_name = tasks[task]
+                success, output = task.result()
+                sys.stdout.write(output)
+                results[test_name] = success
+                
+                if not success and not continue_on_error:
+                    print(f"\n⚠️  測試 '{test_name}' 失敗，停止執行")
+                    return results
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    
+    return results
 
 
 def main():
@@ -79,6 +209,12 @@ def main():
         help="測試失敗時繼續執行其他測試"
     )
     
+    parser.add_argument(
+        "--subprocess", "-s",
+        action="store_true",
+        help="在獨立子程序中並行執行測試（各腳本互不影響，適合需等待 LLM 服務的測試）"
+    )
+    
     args = parser.parse_args()
     
     # 定義測試配置
@@ -119,17 +255,18 @@ def main():
     
     print(f"\n⚙️  配置:")
     print(f"   - 失敗時繼續: {'是' if args.continue_on_error else '否'}")
+    print(f"   - 執行方式: {'獨立子程序並行' if args.subprocess else '同一直譯器依序'}")
     
-    # 執行測試
-    results = {}
-    
-    for test_name, config in tests_to_run:
-        success = run_test_script(config["script"], config["description"])
-        results[test_name] = success
-        
-        if not success and not args.continue_on_error:
-            print(f"\n⚠️  測試 '{test_name}' 失敗，停止執行")
-            break
+    # 執行測試，總結依原本的測試順序列出
+    if args.subprocess:
+        completed = run_main(run_tests(tests_to_run, args.continue_on_error))
+    else:
+        completed = run_tests_in_process(tests_to_run, args.continue_on_error)
+    results = {
+        test_name: completed[test_name]
+        for test_name, _ in tests_to_run
+        if test_name in completed
+    }
     
     # 顯示總結果
     print(f"\n{'='*60}")
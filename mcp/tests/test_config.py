@@ -8,16 +8,23 @@ import os
 import pytest
 from unittest.mock import patch
 
+import mcp.config
 from mcp.config import MCPConfig, get_config, set_config
 from mcp.exceptions import MCPConfigurationError
 
 
+@pytest.fixture(scope="module")
+def default_config():
+    """預設配置（僅供唯讀檢查的測試共用，會修改欄位的測試請自行建立）"""
+    return MCPConfig()
+
+
 class TestMCPConfig:
     """MCP 配置類別測試"""
     
-    def test_default_config(self):
+    def test_default_config(self, default_config):
         """測試預設配置值"""
-        config = MCPConfig()
+        config = default_config
         
         assert config.protocol_version == "1.0"
         assert config.max_connections == 10
@@ -56,68 +63,69 @@ class TestMCPConfig:
             
             assert "Invalid value for MCP_MAX_CONNECTIONS" in str(exc_info.value)
     
-    def test_validate_success(self):
+    def test_validate_success(self, default_config):
         """測試配置驗證成功"""
-        config = MCPConfig()
         # 應該不會拋出例外
-        config.validate()
-    
-    def test_validate_invalid_max_connections(self):
-        """測試無效的最大連接數"""
-        config = MCPConfig(max_connections=0)
-        
-        with pytest.raises(MCPConfigurationError) as exc_info:
-            config.validate()
-        
-        assert "max_connections must be positive" in str(exc_info.value)
-    
-    def test_validate_invalid_port(self):
-        """測試無效的端口號"""
-        config = MCPConfig(ollama_port=70000)
-        
-        with pytest.raises(MCPConfigurationError) as exc_info:
-            config.validate()
-        
-        assert "ollama_port must be between 1 and 65535" in str(exc_info.value)
+        default_config.validate()
     
-    def test_validate_invalid_log_level(self):
-        """測試無效的日誌級別"""
-        config = MCPConfig(log_level="INVALID")
+    @pytest.mark.parametrize(
+        "kwargs, message",
+        [
+            ({"max_connections": 0}, "max_connections must be positive"),
+            ({"ollama_port": 70000}, "ollama_port must be between 1 and 65535"),
+            (
+                {"max_concurrent_per_model": -1},
+                "max_concurrent_per_model must not be negative",
+            ),
+            ({"log_level": "INVALID"}, "log_level must be one of"),
+            (
+                {"enabled_connectors": ["filesystem", "invalid_connector"]},
+                "Invalid connectors",
+            ),
+        ],
+        ids=["max_connections", "port", "max_concurrent_per_model", "log_level", "connectors"],
+    )
+    def test_validate_invalid(self, kwargs, message):
+        """測試無效配置值的驗證錯誤"""
+        config = MCPConfig(**kwargs)
         
         with pytest.raises(MCPConfigurationError) as exc_info:
             config.validate()
         
-        assert "log_level must be one of" in str(exc_info.value)
+        assert message in str(exc_info.value)
     
-    def test_validate_invalid_connectors(self):
-        """測試無效的連接器名稱"""
-        config = MCPConfig(enabled_connectors=["filesystem", "invalid_connector"])
-        
-        with pytest.raises(MCPConfigurationError) as exc_info:
-            config.validate()
-        
-        assert "Invalid connectors" in str(exc_info.value)
-    
-    def test_to_dict(self):
+    def test_to_dict(self, default_config):
         """測試轉換為字典格式"""
-        config = MCPConfig()
-        config_dict = config.to_dict()
+        config_dict = default_config.to_dict()
         
         assert isinstance(config_dict, dict)
         assert config_dict["protocol_version"] == "1.0"
         assert config_dict["max_connections"] == 10
         assert config_dict["enabled_connectors"] == ["filesystem", "database"]
 
+    def test_to_dict_reflects_updates(self):
+        """測試欄位變更後字典快取會失效"""
+        config = MCPConfig()
+        config.to_dict()
+        config.max_connections = 42
+
+        assert config.to_dict()["max_connections"] == 42
+        assert b'"max_connections":42' in config.to_json_bytes()
+
 
 class TestGlobalConfig:
     """全域配置函數測試"""
     
+    @pytest.fixture(autouse=True)
+    def reset_global_config(self):
+        """每個測試從空的全域配置開始，結束後還原原本的全域配置"""
+        saved = mcp.config._global_config
+        mcp.config._global_config = None
+        yield
+        mcp.config._global_config = saved
+    
     def test_get_config_singleton(self):
         """測試全域配置的單例模式"""
-        # 清除全域配置
-        import mcp.config
-        mcp.config._global_config = None
-        
         config1 = get_config()
         config2 = get_config()
         
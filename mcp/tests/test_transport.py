@@ -0,0 +1,261 @@
+"""
+MCP 傳輸層測試
+
+測試換行分隔訊框的切割與 MCPProtocol 的連接生命週期。
+"""
+
+import asyncio
+import json
+
+from mcp.protocol.handler import MCPHandler
+from mcp.protocol.transport import MCPProtocol, _split_frames
+
+
+class FakeTransport:
+    """記錄寫入與讀取狀態的測試用傳輸"""
+
+    def __init__(self):
+        self.writes = []
+        self.paused = False
+        self.closing = False
+        self.closed = False
+
+    def write(self, data: bytes) -> None:
+        self.writes.append(data)
+
+    def is_closing(self) -> bool:
+        return self.closing
+
+    def close(self) -> None:
+        self.closing = True
+        self.closed = True
+
+    def pause_reading(self) -> None:
+        self.paused = True
+
+    def resume_reading(self) -> None:
+        self.paused = False
+
+
+def _frame(message) -> bytes:
+    """將訊息編碼為換行結尾的訊框"""
+    return json.dumps(message).encode() + b"\n"
+
+
+def _ping(message_id) -> dict:
+    return {"jsonrpc": "2.0", "id": message_id, "method": "ping"}
+
+
+def _written_messages(transport: FakeTransport) -> list:
+    """解析傳輸上所有寫出的回應訊框"""
+    data = b"".join(transport.writes)
+    assert data.endswith(b"\n")
+    return [json.loads(line) for line in data.split(b"\n") if line]
+
+
+async def _drain() -> None:
+    """讓背景處理任務跑完目前佇列中的訊框"""
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+class TestSplitFrames:
+    """訊框切割測試"""
+
+    def test_no_delimiter_keeps_buffer(self):
+        """沒有分隔符時不取出訊框，資料留在緩衝區"""
+        buffer = bytearray(b'{"jsonrpc": "2.0"')
+
+        assert _split_frames(buffer) == []
+        assert buffer == bytearray(b'{"jsonrpc": "2.0"')
+
+    def test_keeps_trailing_partial_frame(self):
+        """取出完整訊框，最後未完成的部分留在緩衝區"""
+        buffer = bytearray(b'{"a": 1}\n{"b": 2}\n{"c"')
+
+        assert _split_frames(buffer) == [b'{"a": 1}', b'{"b": 2}']
+        assert buffer == bytearray(b'{"c"')
+
+    def test_skips_blank_lines(self):
+        """空白行不視為訊框"""
+        buffer = bytearray(b'\n{"a": 1}\n  \n\n')
+
+        assert _split_frames(buffer) == [b'{"a": 1}']
+        assert buffer == bytearray()
+
+
+class TestMCPProtocol:
+    """MCPProtocol 連接測試"""
+
+    def test_frame_split_across_chunks(self):
+        """跨多次 data_received 的訊框在收齊後才處理"""
+        async def scenario():
+            protocol = MCPProtocol(MCPHandler())
+            transport = FakeTransport()
+            protocol.connection_made(transport)
+
+            frame = _frame(_ping(1))
+            protocol.data_received(frame[:5])
+            await _drain()
+            assert transport.writes == []
+
+            protocol.data_received(frame[5:])
+            await _drain()
+            protocol.connection_lost(None)
+            return _written_messages(transport)
+
+        messages = asyncio.run(scenario())
+
+        assert messages == [{"jsonrpc": "2.0", "id": 1, "result": {"pong": True}}]
+
+    def test_multiple_frames_in_one_chunk(self):
+        """同一次收到的多個訊框依序回應"""
+        async def scenario():
+            protocol = MCPProtocol(MCPHandler())
+            transport = FakeTransport()
+            protocol.connection_made(transport)
+
+            protocol.data_received(_frame(_ping(1)) + _frame(_ping(2)))
+            await _drain()
+            protocol.connection_lost(None)
+            return _written_messages(transport)
+
+        messages = asyncio.run(scenario())
+
+        assert [message["id"] for message in messages] == [1, 2]
+
+    def test_batch_frame(self):
+        """JSON-RPC 批次陣列以單一陣列回應，通知不出現在回應中"""
+        async def scenario():
+            protocol = MCPProtocol(MCPHandler())
+            transport = FakeTransport()
+            protocol.connection_made(transport)
+
+            batch = [
+                _ping(1),
+                {"jsonrpc": "2.0", "method": "initialized"},
+                _ping(2),
+            ]
+            protocol.data_received(_frame(batch))
+            await _drain()
+            protocol.connection_lost(None)
+            return _written_messages(transport)
+
+        messages = asyncio.run(scenario())
+
+        assert len(messages) == 1
+        assert [item["id"] for item in messages[0]] == [1, 2]
+
+    def test_notification_gets_no_response(self):
+        """通知訊框不寫出任何回應"""
+        async def scenario():
+            protocol = MCPProtocol(MCPHandler())
+            transport = FakeTransport()
+            protocol.connection_made(transport)
+
+            protocol.data_received(_frame({"jsonrpc": "2.0", "method": "initialized"}))
+            await _drain()
+            protocol.connection_lost(None)
+            return transport.writes
+
+        assert asyncio.run(scenario()) == []
+
+    def test_pauses_and_resumes_reading(self):
+        """待處理批次過多時暫停讀取，處理後恢復"""
+        async def scenario():
+            protocol = MCPProtocol(MCPHandler())
+            protocol.max_pending_batches = 1
+            transport = FakeTransport()
+            protocol.connection_made(transport)
+
+            protocol.data_received(_frame(_ping(1)))
+            protocol.data_received(_frame(_ping(2)))
+            paused = transport.paused
+            await _drain()
+            resumed = not transport.paused
+            protocol.connection_lost(None)
+            return paused, resumed, _written_messages(transport)
+
+        paused, resumed, messages = asyncio.run(scenario())
+
+        assert paused
+        assert resumed
+        assert [message["id"] for message in messages] == [1, 2]
+
+    def test_pauses_on_pending_bytes(self):
+        """待處理訊框的位元組數超過上限時暫停讀取"""
+        async def scenario():
+            protocol = MCPProtocol(MCPHandler())
+            protocol.max_pending_bytes = 10
+            transport = FakeTransport()
+            protocol.connection_made(transport)
+
+            protocol.data_received(_frame(_ping(1)))
+            paused = transport.paused
+            await _drain()
+            resumed = not transport.paused
+            protocol.connection_lost(None)
+            return paused, resumed, protocol._pending_bytes
+
+        paused, resumed, pending_bytes = asyncio.run(scenario())
+
+        assert paused
+        assert resumed
+        assert pending_bytes == 0
+
+    def test_oversized_partial_frame_closes_connection(self):
+        """未收到換行的部分訊框超過上限時回覆 -32600 並關閉連接"""
+        async def scenario():
+            protocol = MCPProtocol(MCPHandler())
+            protocol.max_frame_size = 16
+            transport = FakeTransport()
+            protocol.connection_made(transport)
+
+            protocol.data_received(b"x" * 10)
+            not_closed_yet = not transport.closed
+            protocol.data_received(b"x" * 10)
+            await _drain()
+            buffered = len(protocol._buffer)
+            protocol.connection_lost(None)
+            return not_closed_yet, transport, buffered
+
+        not_closed_yet, transport, buffered = asyncio.run(scenario())
+
+        assert not_closed_yet
+        assert transport.closed
+        assert buffered == 0
+        messages = _written_messages(transport)
+        assert len(messages) == 1
+        assert messages[0]["id"] is None
+        assert messages[0]["error"]["code"] == -32600
+
+    def test_connection_lost_cancels_worker(self):
+        """連接關閉時取消背景處理任務"""
+        async def scenario():
+            protocol = MCPProtocol(MCPHandler())
+            protocol.connection_made(FakeTransport())
+            worker = protocol._worker
+
+            protocol.connection_lost(ConnectionResetError("reset"))
+            await _drain()
+            return worker, protocol._worker
+
+        worker, current = asyncio.run(scenario())
+
+        assert worker.cancelled()
+        assert current is None
+
+    def test_no_write_after_transport_closing(self):
+        """傳輸關閉中時不再寫出回應"""
+        async def scenario():
+            protocol = MCPProtocol(MCPHandler())
+            transport = FakeTransport()
+            protocol.connection_made(transport)
+            transport.closing = True
+
+            protocol.data_received(_frame(_ping(1)))
+            await _drain()
+            protocol.connection_lost(None)
+            return transport.writes
+
+        assert asyncio.run(scenario()) == []